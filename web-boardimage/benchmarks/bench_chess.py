@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Perft and microbenchmarks for the chess core.
+
+Runs perft on the standard test positions (the starting position, Kiwipete,
+the en passant, promotion and castling edge cases and a Chess960 position),
+checks the node counts and reports nodes per second. Then times ``push()``
+and ``pop()``, ``fen()`` and ``set_fen()``, ``to_bytes()`` and
+``from_bytes()``, ``san()`` and ``parse_san()``, legal move generation,
+``is_check()``, adjudication with ``status()`` and ``outcome()`` after each
+move, and repeated ``outcome()`` queries on the positions of seeded random
+games. Results can be written as JSON, so runs on different commits can be
+compared with ``--baseline``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, ".."))
+
+import chess
+
+
+# Name, FEN, Chess960 and the known node counts from depth 1. See
+# https://www.chessprogramming.org/Perft_Results.
+PERFT_POSITIONS = [
+    ("start", chess.STARTING_FEN, False, [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", False,
+     [48, 2039, 97862, 4085603]),
+    ("en-passant", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", False, [14, 191, 2812, 43238, 674624]),
+    ("promotion", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", False,
+     [6, 264, 9467, 422333]),
+    ("castling", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", False, [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", False,
+     [46, 2079, 89890, 3894594]),
+    ("chess960", "bqnb1rkr/pp3ppp/3ppn2/2p5/5P2/P2P4/NPP1P1PP/BQ1BNRKR w HFhf - 2 9", True,
+     [21, 528, 12189, 326672, 8146062]),
+]
+
+# Positions with pawns on their last rank, where pawn advances would shift
+# off the board.
+BACKRANK_PAWN_FENS = [
+    "3P4/8/8/8/8/8/8/4K2k w - - 0 1",
+    "4k3/8/8/8/8/8/8/p3K3 b - - 0 1",
+]
+
+# Depths that take well under a second each.
+DEFAULT_DEPTHS = {
+    "start": 4,
+    "kiwipete": 3,
+    "en-passant": 4,
+    "promotion": 3,
+    "castling": 3,
+    "middlegame": 3,
+    "chess960": 3,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=THIS_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def perft(board, depth):
+    if depth == 1:
+        return board.legal_moves.count()
+
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def bench_perft(args):
+    results = []
+    for name, fen, chess960, counts in PERFT_POSITIONS:
+        depth = min(DEFAULT_DEPTHS[name] + args.extra_depth, len(counts))
+        board = chess.Board(fen, chess960=chess960)
+
+        best = float("inf")
+        for _ in range(args.perft_repeat):
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            best = min(best, time.perf_counter() - start)
+            if nodes != counts[depth - 1]:
+                raise SystemExit(f"perft({name}, {depth}) = {nodes}, expected {counts[depth - 1]}")
+
+        results.append({
+            "name": f"perft {name} depth {depth}",
+            "nodes": nodes,
+            "seconds": best,
+            "per_second": nodes / best,
+        })
+        report(results[-1])
+    return results
+
+
+def random_positions(count, plies, seed):
+    """Returns (board, move) pairs from seeded random games."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for _ in range(plies):
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            positions.append((board.copy(stack=False), move))
+            board.push(move)
+    return positions[:count]
+
+
+def bench_micro(args):
+    positions = random_positions(args.positions, args.plies, args.seed)
+    boards = [board for board, _ in positions]
+    fens = [board.fen() for board in boards]
+    packed = [board.to_bytes() for board in boards]
+    sans = [board.san(move) for board, move in positions]
+
+    # Packed generation must agree with the generated moves.
+    for board in boards + [chess.Board(fen) for fen in BACKRANK_PAWN_FENS]:
+        assert list(board.legal_moves.packed()) == [move.pack() for move in board.legal_moves], board.fen()
+        assert list(board.pseudo_legal_moves.packed()) == [move.pack() for move in board.pseudo_legal_moves], board.fen()
+
+    def push_pop():
+        for board, move in positions:
+            board.push(move)
+            board.pop()
+
+    def fen():
+        for board in boards:
+            board.fen()
+
+    def set_fen():
+        # Measure parsing, not the cache of recently parsed FENs.
+        if hasattr(chess, "_parse_fen"):
+            chess._parse_fen.cache_clear()
+        board = chess.Board()
+        for fen in fens:
+            board.set_fen(fen)
+
+    def to_bytes():
+        for board in boards:
+            board.to_bytes()
+
+    def from_bytes():
+        for data in packed:
+            chess.Board.from_bytes(data)
+
+    def san():
+        for board, move in positions:
+            board.san(move)
+
+    def parse_san():
+        for board, san in zip(boards, sans):
+            board.parse_san(san)
+
+    def legal_moves():
+        for board in boards:
+            list(board.legal_moves)
+
+    def legal_moves_count():
+        for board in boards:
+            board.legal_moves.count()
+
+    def legal_moves_packed():
+        for board in boards:
+            board.legal_moves.packed()
+
+    def is_check():
+        for board in boards:
+            board.is_check()
+
+    def adjudicate():
+        for board, move in positions:
+            board.push(move)
+            board.status()
+            board.outcome()
+            board.pop()
+
+    def outcome():
+        for board in boards:
+            board.outcome()
+
+    results = []
+    for name, fn in [
+        ("push + pop", push_pop),
+        ("fen", fen),
+        ("set_fen", set_fen),
+        ("to_bytes", to_bytes),
+        ("from_bytes", from_bytes),
+        ("san", san),
+        ("parse_san", parse_san),
+        ("legal_moves", legal_moves),
+        ("legal_moves.count", legal_moves_count),
+        ("legal_moves.packed", legal_moves_packed),
+        ("is_check", is_check),
+        ("push + status + outcome", adjudicate),
+        ("outcome (repeated)", outcome),
+    ]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=args.repeat)) / len(positions)
+        results.append({
+            "name": name,
+            "seconds": seconds,
+            "per_second": 1 / seconds,
+        })
+        report(results[-1])
+    return results
+
+
+def report(result, baseline=None):
+    if "nodes" in result:
+        line = f"{result['name']:<30} {result['nodes']:>9} nodes  {result['per_second']:10.0f} nodes/s"
+    else:
+        line = f"{result['name']:<30} {result['seconds'] * 1e6:9.2f} us  {result['per_second']:10.0f} ops/s"
+    if baseline is not None:
+        change = result["per_second"] / baseline["per_second"] - 1
+        line += f"  ({change:+.1%} vs baseline)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", choices=["perft", "micro"], default=["perft", "micro"])
+    parser.add_argument("--extra-depth", type=int, default=0, help="search deeper than the default perft depths")
+    parser.add_argument("--perft-repeat", type=int, default=1, help="perft runs per position (best is reported)")
+    parser.add_argument("--positions", type=int, default=2000, help="positions for the microbenchmarks")
+    parser.add_argument("--plies", type=int, default=80, help="maximum plies per random game (default: 80)")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements (best is reported)")
+    parser.add_argument("--output", "-o", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = []
+    if "perft" in args.suites:
+        results += bench_perft(args)
+    if "micro" in args.suites:
+        results += bench_micro(args)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+        print("\nCompared with", args.baseline)
+        for result in results:
+            if result["name"] in baseline:
+                report(result, baseline[result["name"]])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": {k: v for k, v in vars(args).items() if k not in ["output", "baseline"]},
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
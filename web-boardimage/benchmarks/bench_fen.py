@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for parsing and writing FENs.
+
+Parses all FENs of a corpus (by default ``fen_data_list.json`` of the
+synthetic detection dataset) with ``Board()`` and ``set_fen()``, both with
+a cold cache of recently parsed FENs and with the FENs already cached, and
+parses their board parts with ``set_board_fen()``. Then writes them with
+``fen()`` and ``board_fen()``. Checks that all FENs round-trip. Results can
+be written as JSON, so runs on different commits can be compared with
+``--baseline``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, ".."))
+
+import chess
+
+DEFAULT_CORPUS = os.path.join(THIS_DIR, "..", "..", "detect-chess-board-screenshots", "synthetic_data_creation", "fen_data_list.json")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=THIS_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_fens(path):
+    with open(path) as f:
+        return [entry["fen"] if isinstance(entry, dict) else entry for entry in json.load(f)]
+
+
+def clear_cache():
+    # Older commits have no cache.
+    parse_fen = getattr(chess, "_parse_fen", None)
+    if parse_fen is not None:
+        parse_fen.cache_clear()
+
+
+def report(result, baseline=None):
+    line = f"{result['name']:<20} {result['seconds'] * 1e6:8.2f} us  {result['per_second']:10.0f} ops/s"
+    if baseline is not None:
+        change = result["per_second"] / baseline["per_second"] - 1
+        line += f"  ({change:+.1%} vs baseline)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSON list of FENs or objects with a fen")
+    parser.add_argument("--cached", type=int, default=1000, help="distinct FENs for the cached measurement")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements (best is reported)")
+    parser.add_argument("--output", "-o", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    fens = load_fens(args.corpus)
+    cached_fens = list(dict.fromkeys(fens))[:args.cached]
+    board_fens = [fen.split(" ", 1)[0] for fen in fens]
+    boards = [chess.Board(fen) for fen in fens]
+    for fen, board in zip(fens, boards):
+        assert board.fen(en_passant="fen") == fen, fen
+
+    board = chess.Board()
+    base_board = chess.BaseBoard()
+
+    def construct():
+        clear_cache()
+        for fen in fens:
+            chess.Board(fen)
+
+    def set_fen():
+        clear_cache()
+        for fen in fens:
+            board.set_fen(fen)
+
+    def set_fen_cached():
+        for fen in cached_fens:
+            board.set_fen(fen)
+
+    def set_board_fen():
+        for board_fen in board_fens:
+            base_board.set_board_fen(board_fen)
+
+    def fen():
+        for board in boards:
+            board.fen()
+
+    def board_fen():
+        for board in boards:
+            board.board_fen()
+
+    # The cached FENs are warmed up before every repeat, since set_fen()
+    # clears the cache.
+    results = []
+    for name, fn, setup, count in [
+        ("Board(fen)", construct, "pass", len(fens)),
+        ("set_fen", set_fen, "pass", len(fens)),
+        ("set_fen (cached)", set_fen_cached, set_fen_cached, len(cached_fens)),
+        ("set_board_fen", set_board_fen, "pass", len(fens)),
+        ("fen", fen, "pass", len(fens)),
+        ("board_fen", board_fen, "pass", len(fens)),
+    ]:
+        seconds = min(timeit.repeat(fn, setup=setup, number=1, repeat=args.repeat)) / count
+        results.append({
+            "name": name,
+            "seconds": seconds,
+            "per_second": 1 / seconds,
+        })
+        report(results[-1])
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+        print("\nCompared with", args.baseline)
+        for result in results:
+            if result["name"] in baseline:
+                report(result, baseline[result["name"]])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": {k: v for k, v in vars(args).items() if k not in ["output", "baseline"]},
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import time benchmark.
+
+Imports each module in fresh interpreters, like a short-lived worker or CLI
+process would, and reports the best and median wall time of the import
+statement. Bytecode is compiled once up front, so compilation is not
+measured. Also times the construction of the slider attack tables, which
+used to dominate ``import chess``. Results can be written as JSON, so runs
+on different commits can be compared with ``--baseline``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(THIS_DIR, "..")
+sys.path.insert(0, ROOT_DIR)
+
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=THIS_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def import_time(module, env):
+    output = subprocess.check_output([sys.executable, "-c", SNIPPET.format(module=module)], cwd=ROOT_DIR, env=env)
+    return float(output)
+
+
+def bench_imports(args):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    results = []
+    for module in args.modules:
+        import_time(module, env)  # Write bytecode
+        times = [import_time(module, env) for _ in range(args.runs)]
+        results.append({
+            "name": f"import {module}",
+            "seconds": min(times),
+            "median_seconds": statistics.median(times),
+        })
+        report(results[-1])
+    return results
+
+
+def bench_tables(args):
+    import chess
+
+    results = []
+    for name, stmt in [
+        ("_attack_table (diagonals)", lambda: chess._attack_table([-9, -7, 7, 9])),
+        ("_attack_table (files)", lambda: chess._attack_table([-8, 8])),
+        ("_attack_table (ranks)", lambda: chess._attack_table([-1, 1])),
+        ("_rays", chess._rays),
+    ]:
+        seconds = min(timeit.repeat(stmt, number=1, repeat=args.repeat))
+        results.append({"name": name, "seconds": seconds})
+        report(results[-1])
+    return results
+
+
+def report(result, baseline=None):
+    line = f"{result['name']:<30} {result['seconds'] * 1000:8.2f} ms"
+    if "median_seconds" in result:
+        line += f"  (median {result['median_seconds'] * 1000:.2f} ms)"
+    if baseline is not None:
+        change = result["seconds"] / baseline["seconds"] - 1
+        line += f"  ({change:+.1%} vs baseline)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=["chess", "chess.svg", "chess.pgn", "server"])
+    parser.add_argument("--runs", "-n", type=int, default=20, help="interpreters per module (default: 20)")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements of the tables (best is reported)")
+    parser.add_argument("--output", "-o", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = bench_imports(args) + bench_tables(args)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+        print("\nCompared with", args.baseline)
+        for result in results:
+            if result["name"] in baseline:
+                report(result, baseline[result["name"]])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": {k: v for k, v in vars(args).items() if k not in ["output", "baseline"]},
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
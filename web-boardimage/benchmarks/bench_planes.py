@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for encoding positions as NumPy planes.
+
+Encodes batches of positions from seeded random games with
+``chess.batch.PlaneEncoder``, both from boards and from tuples of bitboards,
+and compares that with filling the planes one board at a time with
+``piece_map()``, like the callers used to do. Checks that both agree.
+Requires NumPy.
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chess
+import chess.batch
+
+import numpy as np
+
+
+def random_boards(count, plies, seed):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(plies):
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                break
+            board.push(rng.choice(legal_moves))
+            boards.append(board.copy(stack=False))
+    return boards[:count]
+
+
+def encode_per_board(boards, dtype):
+    planes = np.zeros((len(boards), chess.batch.PLANES, 8, 8), dtype=dtype)
+    for index, board in enumerate(boards):
+        for square, piece in board.piece_map().items():
+            plane = piece.piece_type - 1 + (0 if piece.color else 6)
+            planes[index, plane, chess.square_rank(square), chess.square_file(square)] = 1
+        if board.turn:
+            planes[index, 12] = 1
+        for square in chess.scan_forward(board.clean_castling_rights()):
+            planes[index, 13, chess.square_rank(square), chess.square_file(square)] = 1
+        if board.ep_square is not None:
+            planes[index, 14, chess.square_rank(board.ep_square), chess.square_file(board.ep_square)] = 1
+    return planes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", "-b", type=int, default=1024, help="positions per batch (default: 1024)")
+    parser.add_argument("--plies", type=int, default=80, help="maximum plies per random game (default: 80)")
+    parser.add_argument("--dtype", choices=["uint8", "float32"], default="float32")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements (best is reported)")
+    args = parser.parse_args()
+
+    boards = random_boards(args.batch_size, args.plies, args.seed)
+    tuples = [chess.batch.bitboard_tuple(board) for board in boards]
+    encoder = chess.batch.PlaneEncoder(args.batch_size, dtype=args.dtype)
+    out = np.empty((args.batch_size, chess.batch.PLANES, 8, 8), dtype=args.dtype)
+
+    expected = encode_per_board(boards, args.dtype)
+    assert np.array_equal(encoder.encode(boards), expected)
+    assert np.array_equal(encoder.encode(tuples, out=out), expected)
+
+    print(f"{args.batch_size} positions, {args.dtype}, us per position")
+    for name, fn in [
+        ("per board", lambda: encode_per_board(boards, args.dtype)),
+        ("PlaneEncoder (boards)", lambda: encoder.encode(boards)),
+        ("PlaneEncoder (tuples)", lambda: encoder.encode(tuples)),
+        ("PlaneEncoder (out=)", lambda: encoder.encode(tuples, out=out)),
+    ]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=args.repeat)) / args.batch_size
+        print(f"{name:<24} {seconds * 1e6:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for feature extraction with ``chess.batch.PositionBatch``.
+
+Computes checkers, piece counts, attacked squares and insufficient material
+for the positions of seeded random games, once per position with
+``chess.Board`` methods and once for all positions with the vectorized
+kernels of ``chess.batch.PositionBatch``, and checks that both agree, as
+well as the Zobrist hashes of the boards taken back out of the batch.
+Loading the batch from FENs is reported separately. Requires NumPy.
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chess
+import chess.batch
+import chess.polyglot
+
+
+def random_fens(count, plies, seed):
+    rng = random.Random(seed)
+    fens = []
+    while len(fens) < count:
+        board = chess.Board()
+        for _ in range(plies):
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                break
+            board.push(rng.choice(legal_moves))
+            fens.append(board.fen())
+    return fens[:count]
+
+
+def attacked_mask(board, color):
+    mask = chess.BB_EMPTY
+    for square in chess.scan_forward(board.occupied_co[color]):
+        mask |= board.attacks_mask(square)
+    return mask
+
+
+def per_board(boards):
+    return [(
+        board.checkers_mask(),
+        [len(board.pieces(piece_type, color)) for color in chess.COLORS for piece_type in chess.PIECE_TYPES],
+        attacked_mask(board, chess.WHITE),
+        attacked_mask(board, chess.BLACK),
+        board.is_insufficient_material(),
+    ) for board in boards]
+
+
+def per_batch(batch):
+    return (
+        batch.checkers_mask(),
+        batch.piece_counts(chess.BLACK),
+        batch.piece_counts(chess.WHITE),
+        batch.attacked_mask(chess.WHITE),
+        batch.attacked_mask(chess.BLACK),
+        batch.is_insufficient_material(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", "-n", type=int, default=10000, help="number of positions (default: 10000)")
+    parser.add_argument("--plies", type=int, default=80, help="maximum plies per random game (default: 80)")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements (best is reported)")
+    args = parser.parse_args()
+
+    fens = random_fens(args.positions, args.plies, args.seed)
+    boards = [chess.Board(fen) for fen in fens]
+    batch = chess.batch.PositionBatch.from_fens(fens)
+
+    expected = per_board(boards)
+    checkers, black_counts, white_counts, white_attacks, black_attacks, insufficient = per_batch(batch)
+    for index, (board_checkers, counts, board_white_attacks, board_black_attacks, board_insufficient) in enumerate(expected):
+        assert board_checkers == checkers[index]
+        assert counts == list(white_counts[index]) + list(black_counts[index])
+        assert board_white_attacks == white_attacks[index]
+        assert board_black_attacks == black_attacks[index]
+        assert board_insufficient == insufficient[index]
+
+    for index, board in enumerate(boards):
+        assert chess.polyglot.zobrist_hash(batch.board(index)) == chess.polyglot.zobrist_hash(board)
+
+    print(f"{args.positions} positions, us per position")
+    for name, fn in [
+        ("Board(fen)", lambda: [chess.Board(fen) for fen in fens]),
+        ("PositionBatch.from_fens", lambda: chess.batch.PositionBatch.from_fens(fens)),
+        ("features per board", lambda: per_board(boards)),
+        ("features per batch", lambda: per_batch(batch)),
+        ("is_check per board", lambda: [board.is_check() for board in boards]),
+        ("is_check per batch", batch.is_check),
+    ]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=args.repeat)) / args.positions
+        print(f"{name:<24} {seconds * 1e6:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Microbenchmark for ``Board.push()`` and ``Board.pop()``.
+
+Replays seeded random games move by move and takes them back again, and
+reports the time per push and per pop. Then replays the longest game with
+``tracemalloc`` running and reports the memory retained per ply on the move
+stack (the undo state plus the move itself), as well as the memory retained
+by copies of the board that share its history.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chess
+import chess.variant
+
+
+def random_games(cls, count, plies, seed):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = cls()
+        moves = []
+        for _ in range(plies):
+            legal_moves = list(board.legal_moves)
+            if not legal_moves or board.is_variant_end():
+                break
+            move = rng.choice(legal_moves)
+            board.push(move)
+            moves.append(move)
+        games.append(moves)
+    return games
+
+
+def retained(fn):
+    """Returns the result of *fn* and the number of bytes it kept allocated."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variant", default="chess", help="variant name (default: chess)")
+    parser.add_argument("--games", type=int, default=50, help="number of random games (default: 50)")
+    parser.add_argument("--plies", type=int, default=200, help="maximum plies per game (default: 200)")
+    parser.add_argument("--copies", type=int, default=100, help="copies for the shared history measurement")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements (best is reported)")
+    args = parser.parse_args()
+
+    cls = chess.variant.find_variant(args.variant)
+    games = random_games(cls, args.games, args.plies, args.seed)
+    plies = sum(len(moves) for moves in games)
+
+    def run():
+        board = cls()
+        push_time = pop_time = 0.0
+        for moves in games:
+            start = time.perf_counter()
+            for move in moves:
+                board.push(move)
+            pushed = time.perf_counter()
+            for _ in moves:
+                board.pop()
+            push_time += pushed - start
+            pop_time += time.perf_counter() - pushed
+        return push_time / plies, pop_time / plies
+
+    push_time, pop_time = min(run() for _ in range(args.repeat))
+
+    longest = max(games, key=len)
+
+    def replay():
+        board = cls()
+        for move in longest:
+            board.push(move)
+        return board
+
+    board, board_bytes = retained(replay)
+    _, copy_bytes = retained(lambda: [board.copy() for _ in range(args.copies)])
+
+    print(f"{cls.uci_variant}: {plies} plies in {len(games)} games")
+    print(f"push:                 {push_time * 1e6:7.2f} us")
+    print(f"pop:                  {pop_time * 1e6:7.2f} us")
+    print(f"memory per ply:       {board_bytes / len(longest):7.0f} bytes (longest game, {len(longest)} plies)")
+    print(f"memory per copy:      {copy_bytes / args.copies:7.0f} bytes (full stack, {len(board.move_stack)} plies)")
+
+
+if __name__ == "__main__":
+    main()
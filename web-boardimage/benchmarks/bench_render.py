@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Render benchmark for web-boardimage.
+
+Drives ``Service.make_svg`` and ``Service.render_png`` in-process, and the
+same endpoints over a local aiohttp server, with positions from a FEN corpus
+and a sweep of sizes, piece sets, themes, arrows and coordinates. Reports
+renders per second, p50/p99 latency and peak RSS, and writes the results as
+JSON, so runs on different commits can be compared with ``--baseline``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import urllib.parse
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, ".."))
+
+import aiohttp
+import aiohttp.web
+from aiohttp.test_utils import make_mocked_request
+
+import server
+
+
+DEFAULT_CORPUS = os.path.join(
+    THIS_DIR, "..", "..", "detect-chess-board-screenshots", "synthetic_data_creation", "fen_data_list.json"
+)
+
+
+def load_corpus(path, limit):
+    with open(path) as f:
+        entries = json.load(f)
+    return entries[:limit]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux, but in bytes on macOS.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=THIS_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def query(entry, config):
+    params = {
+        "fen": entry["fen"],
+        "size": str(config["size"]),
+        "pieceSet": config["pieceSet"],
+        "colors": config["colors"],
+        "coordinates": "1" if config["coordinates"] else "0",
+    }
+    if "lastMove" in entry:
+        params["lastMove"] = entry["lastMove"]
+        if config["arrows"]:
+            params["arrows"] = "G" + entry["lastMove"][:4]
+    if "check" in entry:
+        params["check"] = entry["check"]
+    return params
+
+
+def summarize(latencies, elapsed):
+    return {
+        "renders": len(latencies),
+        "renders_per_second": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+async def bench_inprocess(service, fmt, corpus, config):
+    latencies = []
+    start = time.perf_counter()
+    for entry in corpus:
+        request = make_mocked_request("GET", "/board.svg?" + urllib.parse.urlencode(query(entry, config)))
+        t = time.perf_counter()
+        if fmt == "svg":
+            service.make_svg(request)
+        else:
+            await service.render_png(request)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def bench_http(session, base_url, fmt, corpus, config, concurrency):
+    latencies = []
+    entries = iter(corpus)
+
+    async def worker():
+        for entry in entries:
+            t = time.perf_counter()
+            async with session.get(f"{base_url}/board.{fmt}", params=query(entry, config)) as response:
+                await response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"{response.status} for {query(entry, config)}")
+            latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run(args):
+    corpus = load_corpus(args.corpus, args.count)
+    configs = [
+        dict(zip(["size", "pieceSet", "colors", "arrows", "coordinates"], values))
+        for values in itertools.product(args.sizes, args.piece_sets, args.themes, args.arrows, args.coordinates)
+    ]
+
+    service = server.Service()
+    results = []
+
+    if "inprocess" in args.modes:
+        for fmt, config in itertools.product(args.formats, configs):
+            result = await bench_inprocess(service, fmt, corpus, config)
+            results.append({"mode": "inprocess", "format": fmt, **config, **result})
+            report(results[-1])
+
+    if "http" in args.modes:
+        app = aiohttp.web.Application(middlewares=[service.middleware])
+        app.router.add_get("/board.png", service.render_png)
+        app.router.add_get("/board.svg", service.render_svg)
+        runner = aiohttp.web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = aiohttp.web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            async with aiohttp.ClientSession() as session:
+                for fmt, config in itertools.product(args.formats, configs):
+                    result = await bench_http(session, f"http://127.0.0.1:{port}", fmt, corpus, config, args.concurrency)
+                    results.append({"mode": "http", "format": fmt, "concurrency": args.concurrency, **config, **result})
+                    report(results[-1])
+        finally:
+            await runner.cleanup()
+
+    return results
+
+
+def key(result):
+    return tuple(result[k] for k in ["mode", "format", "size", "pieceSet", "colors", "arrows", "coordinates"])
+
+
+def report(result, baseline=None):
+    line = (
+        f"{result['mode']:<9} {result['format']:<3} size={result['size']:<4} {result['pieceSet']:<10} "
+        f"{result['colors']:<13} arrows={int(result['arrows'])} coords={int(result['coordinates'])}  "
+        f"{result['renders_per_second']:8.1f}/s  p50={result['p50_ms']:7.2f}ms  p99={result['p99_ms']:7.2f}ms  "
+        f"rss={result['peak_rss_mib']:.0f}MiB"
+    )
+    if baseline is not None:
+        change = result["renders_per_second"] / baseline["renders_per_second"] - 1
+        line += f"  ({change:+.1%} vs baseline)"
+    print(line)
+
+
+def bool_list(values):
+    return [value in server.AFFIRMATIVE_STRS for value in values]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSON list of {fen, lastMove, check} objects")
+    parser.add_argument("--count", "-n", type=int, default=50, help="positions per configuration")
+    parser.add_argument("--modes", nargs="+", choices=["inprocess", "http"], default=["inprocess", "http"])
+    parser.add_argument("--formats", nargs="+", choices=["svg", "png"], default=["svg", "png"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[360, 1024])
+    parser.add_argument("--piece-sets", nargs="+", default=["merida", "cburnett"])
+    parser.add_argument("--themes", nargs="+", default=["lichess-brown"])
+    parser.add_argument("--arrows", nargs="+", default=["0", "1"], help="0, 1 or both")
+    parser.add_argument("--coordinates", nargs="+", default=["0", "1"], help="0, 1 or both")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="parallel HTTP clients")
+    parser.add_argument("--output", "-o", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+    args.arrows = bool_list(args.arrows)
+    args.coordinates = bool_list(args.coordinates)
+
+    results = asyncio.run(run(args))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {key(result): result for result in json.load(f)["results"]}
+        print("\nCompared with", args.baseline)
+        for result in results:
+            if key(result) in baseline:
+                report(result, baseline[key(result)])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": {k: v for k, v in vars(args).items() if k not in ["output", "baseline"]},
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for hash-based repetition detection.
+
+Replays seeded random games with long stretches of piece maneuvering and
+calls ``Board.outcome(claim_draw=True)`` after every ply, like an analysis
+that keeps checking for game end, with the current implementation and with
+the former one, that popped moves off the stack and replayed them to
+compare transposition keys. Also checks that both agree.
+"""
+
+import argparse
+import collections
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chess
+
+
+class LegacyBoard(chess.Board):
+    """The former pop/replay repetition detection, kept as the baseline."""
+
+    def can_claim_threefold_repetition(self):
+        transposition_key = self._transposition_key()
+        transpositions = collections.Counter()
+        transpositions.update((transposition_key, ))
+
+        # Count positions.
+        switchyard = []
+        while self.move_stack:
+            move = self.pop()
+            switchyard.append(move)
+
+            if self.is_irreversible(move):
+                break
+
+            transpositions.update((self._transposition_key(), ))
+
+        while switchyard:
+            self.push(switchyard.pop())
+
+        # Threefold repetition occurred.
+        if transpositions[transposition_key] >= 3:
+            return True
+
+        # The next legal move is a threefold repetition.
+        for move in self.generate_legal_moves():
+            self.push(move)
+            try:
+                if transpositions[self._transposition_key()] >= 2:
+                    return True
+            finally:
+                self.pop()
+
+        return False
+
+    def is_repetition(self, count=3):
+        # Fast check, based on occupancy only.
+        maybe_repetitions = 1
+        for state in reversed(self._stack):
+            if state.occupied == self.occupied:
+                maybe_repetitions += 1
+                if maybe_repetitions >= count:
+                    break
+        if maybe_repetitions < count:
+            return False
+
+        # Check full replay.
+        transposition_key = self._transposition_key()
+        switchyard = []
+
+        try:
+            while True:
+                if count <= 1:
+                    return True
+
+                if len(self.move_stack) < count - 1:
+                    break
+
+                move = self.pop()
+                switchyard.append(move)
+
+                if self.is_irreversible(move):
+                    break
+
+                if self._transposition_key() == transposition_key:
+                    count -= 1
+        finally:
+            while switchyard:
+                self.push(switchyard.pop())
+
+        return False
+
+
+def random_game(plies, zeroing_rate, rng):
+    """Plays mostly quiet moves, and a capture or pawn move now and then."""
+    board = chess.Board()
+    for _ in range(plies):
+        legal_moves = list(board.legal_moves)
+        if not legal_moves or board.halfmove_clock >= 98:
+            break
+        zeroing = [move for move in legal_moves if board.is_zeroing(move)]
+        quiet = [move for move in legal_moves if not board.is_zeroing(move)]
+        if zeroing and (not quiet or rng.random() < zeroing_rate):
+            board.push(rng.choice(zeroing))
+        else:
+            board.push(rng.choice(quiet))
+    return board.move_stack
+
+
+def replay(cls, moves):
+    board = cls()
+    outcomes = []
+    for move in moves:
+        board.push(move)
+        outcome = board.outcome(claim_draw=True)
+        outcomes.append(outcome.termination if outcome else None)
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=10, help="number of random games (default: 10)")
+    parser.add_argument("--plies", type=int, default=300, help="maximum plies per game (default: 300)")
+    parser.add_argument("--zeroing-rate", type=float, default=0.02, help="chance to play a capture or pawn move")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="measurements (best is reported)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    games = [random_game(args.plies, args.zeroing_rate, rng) for _ in range(args.games)]
+    plies = sum(len(moves) for moves in games)
+
+    for moves in games:
+        assert replay(chess.Board, moves) == replay(LegacyBoard, moves)
+    repetitions = sum(
+        termination == chess.Termination.THREEFOLD_REPETITION
+        for moves in games
+        for termination in replay(chess.Board, moves)
+    )
+
+    results = {}
+    for name, cls in [("pop/replay", LegacyBoard), ("hashes", chess.Board)]:
+        def run():
+            for moves in games:
+                replay(cls, moves)
+        results[name] = min(timeit.repeat(run, number=1, repeat=args.repeat)) / plies
+
+    print(f"{plies} plies, {repetitions} with a threefold repetition claim")
+    for name, seconds in results.items():
+        print(f"outcome(claim_draw=True) with {name:<10}: {seconds * 1e6:8.1f} us per ply")
+    print(f"speedup: {results['pop/replay'] / results['hashes']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
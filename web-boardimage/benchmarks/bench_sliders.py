@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for the layout of the slider attack tables.
+
+``chess`` looks up slider attacks in one dict per square, keyed by the
+relevant occupancy, like ``BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] &
+occupied]``. This compares that with array-indexed layouts, where the
+occupancy is turned into an index into a flat list: a plain shift for
+ranks, and a multiply and shift with magic numbers (found by a seeded
+search) for files and diagonals. Also checks that all layouts agree.
+
+Run it again before changing the layout, e.g. on a new Python version.
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chess
+
+
+def find_magic(masks, attacks, square, rng):
+    """Finds a magic number that maps the occupancies to distinct slots."""
+    bits = chess.popcount(masks[square])
+    shift = 64 - bits
+    while True:
+        magic = rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        table = [None] * (1 << bits)
+        for subset, attack in attacks[square].items():
+            index = ((subset * magic) & chess.BB_ALL) >> shift
+            if table[index] is None:
+                table[index] = attack
+            elif table[index] != attack:
+                break
+        else:
+            return magic, shift, table
+
+
+def magic_tables(masks, attacks, rng):
+    magics, shifts, offsets, flat = [], [], [], []
+    for square in chess.SQUARES:
+        magic, shift, table = find_magic(masks, attacks, square, rng)
+        magics.append(magic)
+        shifts.append(shift)
+        offsets.append(len(flat))
+        flat.extend(chess.BB_EMPTY if attack is None else attack for attack in table)
+    return magics, shifts, offsets, flat
+
+
+def rank_tables():
+    shifts = [8 * chess.square_rank(square) + 1 for square in chess.SQUARES]
+    flat = [chess.BB_EMPTY] * (64 * 64)
+    for square in chess.SQUARES:
+        # The six inner squares of the rank, including the square itself.
+        for index in range(64):
+            subset = chess.BB_RANK_MASKS[square] & (index << shifts[square])
+            flat[square * 64 + index] = chess.BB_RANK_ATTACKS[square][subset]
+    return shifts, flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=10000, help="random lookups per measurement")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", "-r", type=int, default=7, help="measurements (best is reported)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pairs = [
+        (rng.randrange(64), rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64))
+        for _ in range(args.lookups)
+    ]
+
+    namespace = dict(vars(chess), pairs=pairs)
+    (namespace["DIAG_MAGICS"], namespace["DIAG_SHIFTS"],
+     namespace["DIAG_OFFSETS"], namespace["DIAG_FLAT"]) = magic_tables(chess.BB_DIAG_MASKS, chess.BB_DIAG_ATTACKS, rng)
+    (namespace["FILE_MAGICS"], namespace["FILE_SHIFTS"],
+     namespace["FILE_OFFSETS"], namespace["FILE_FLAT"]) = magic_tables(chess.BB_FILE_MASKS, chess.BB_FILE_ATTACKS, rng)
+    namespace["RANK_SHIFTS"], namespace["RANK_FLAT"] = rank_tables()
+
+    # Inline the lookups, like the move generation does, rather than
+    # measuring the calls.
+    def loop(expr):
+        return eval(f"lambda: [{expr} for square, occupied in pairs]", namespace)
+
+    expressions = {
+        "dict": {
+            "diagonals": "BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]",
+            "files": "BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied]",
+            "ranks": "BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied]",
+        },
+        "array": {
+            "diagonals": "DIAG_FLAT[DIAG_OFFSETS[square] + (((BB_DIAG_MASKS[square] & occupied) * "
+                         "DIAG_MAGICS[square] & BB_ALL) >> DIAG_SHIFTS[square])]",
+            "files": "FILE_FLAT[FILE_OFFSETS[square] + (((BB_FILE_MASKS[square] & occupied) * "
+                     "FILE_MAGICS[square] & BB_ALL) >> FILE_SHIFTS[square])]",
+            "ranks": "RANK_FLAT[square * 64 + ((occupied >> RANK_SHIFTS[square]) & 63)]",
+        },
+    }
+
+    for line in ["diagonals", "files", "ranks"]:
+        assert loop(expressions["dict"][line])() == loop(expressions["array"][line])(), line
+
+    baseline = min(timeit.repeat(loop("square"), number=1, repeat=args.repeat))
+    print(f"{args.lookups} random lookups, ns per lookup (without loop overhead)")
+    for line in ["diagonals", "files", "ranks"]:
+        times = {
+            layout: (min(timeit.repeat(loop(exprs[line]), number=1, repeat=args.repeat)) - baseline) / args.lookups
+            for layout, exprs in expressions.items()
+        }
+        print(f"{line:<10} dict: {times['dict'] * 1e9:6.1f}  array: {times['array'] * 1e9:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Regression benchmark for the removed ``deduplicate_svg_attrs`` pass.
+
+``chess.svg.board()`` used to emit duplicate ``xmlns``/``xmlns:xlink``
+attributes on the outer ``<svg>`` tag, which the server patched up with a
+full-string regex rewrite on every request. This measures the render time
+and the cost of that former pass, so the saved time per render is visible,
+and checks that the current output no longer needs it.
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chess
+import chess.svg as svg
+
+
+FENS = [
+    chess.STARTING_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    "8/8/8/8/4N3/8/8/8 w - - 0 1",
+]
+
+
+def _legacy_split_not_in_quotes(s, delim=" ", quotes=None):
+    # Former ``server.split_not_in_quotes``, kept here as the baseline.
+    if quotes is None:
+        quotes = [('"', '"'), ("'", "'")]
+
+    stack = deque()
+    splits = []
+    current_split = []
+
+    for char in s:
+        if not stack and char == delim:
+            splits.append("".join(current_split))
+            current_split = []
+        else:
+            current_split.append(char)
+
+        if stack and char == stack[-1]:
+            stack.pop()
+        elif not stack:
+            for open_quote, close_quote in quotes:
+                if char == open_quote:
+                    stack.append(close_quote)
+                    break
+
+    if current_split:
+        splits.append("".join(current_split))
+
+    return splits
+
+
+def legacy_deduplicate_svg_attrs(svg_string):
+    """The per-request pass formerly done by ``server.deduplicate_svg_attrs``."""
+    PAT = re.compile(r"<svg ?([^>]*)>")
+    svg_attrs = re.match(PAT, svg_string).group(1)
+    attrs = {}
+    for attr in _legacy_split_not_in_quotes(svg_attrs):
+        key, value = attr.split("=", 1)
+        attrs[key] = value
+    new_attrs = " ".join([f"{key}={value}" for key, value in attrs.items()])
+    return re.sub(PAT, f"<svg {new_attrs}>", svg_string, count=1)
+
+
+def has_duplicate_attrs(svg_string):
+    names = re.findall(r"(\S+)=\"", re.match(r"<svg ?([^>]*)>", svg_string).group(1))
+    return len(names) != len(set(names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--piece-set", default="caliente", help="piece set to render (default: caliente)")
+    parser.add_argument("--number", "-n", type=int, default=200, help="renders per measurement")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements per size (best is reported)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[360, 1024])
+    args = parser.parse_args()
+
+    boards = [chess.Board(fen) for fen in FENS]
+
+    for size in args.sizes:
+        def render():
+            for board in boards:
+                svg.board(board, size=size, piece_set=args.piece_set)
+
+        rendered = [svg.board(board, size=size, piece_set=args.piece_set) for board in boards]
+        assert not any(has_duplicate_attrs(svg_string) for svg_string in rendered)
+
+        def dedup():
+            for svg_string in rendered:
+                legacy_deduplicate_svg_attrs(svg_string)
+
+        per_render = args.number * len(boards)
+        render_time = min(timeit.repeat(render, number=args.number, repeat=args.repeat)) / per_render
+        saved_time = min(timeit.repeat(dedup, number=args.number, repeat=args.repeat)) / per_render
+
+        print(f"size={size:<5d} render: {render_time * 1e6:8.1f} us  "
+              f"saved per render: {saved_time * 1e6:6.1f} us "
+              f"({saved_time / (render_time + saved_time):.1%} of the former total)")
+
+if __name__ == "__main__":
+    main()
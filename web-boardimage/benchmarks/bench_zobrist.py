@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for the incremental Zobrist hash of ``chess.Board``.
+
+Compares ``chess.polyglot.zobrist_hash()``, which only hashes castling
+rights, en passant and turn on top of the piece hash maintained by
+``push()`` and ``pop()``, with a full ``ZobristHasher.__call__`` scan of all
+pieces, on the positions of seeded random games. Also reports the cost of
+a push/pop pair, which now includes the incremental update.
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chess
+import chess.polyglot
+
+
+def random_games(count, plies, seed):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = chess.Board()
+        moves = []
+        for _ in range(plies):
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            board.push(move)
+            moves.append(move)
+        games.append(moves)
+    return games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50, help="number of random games (default: 50)")
+    parser.add_argument("--plies", type=int, default=100, help="maximum plies per game (default: 100)")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="measurements (best is reported)")
+    args = parser.parse_args()
+
+    games = random_games(args.games, args.plies, args.seed)
+    boards = []
+    for moves in games:
+        board = chess.Board()
+        for move in moves:
+            board.push(move)
+            boards.append(board.copy(stack=False))
+
+    full_hasher = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+    for board in boards:
+        assert chess.polyglot.zobrist_hash(board) == full_hasher(board), board.fen()
+
+    def full():
+        for board in boards:
+            full_hasher(board)
+
+    def incremental():
+        for board in boards:
+            chess.polyglot.zobrist_hash(board)
+
+    def push_pop():
+        board = chess.Board()
+        for moves in games:
+            for move in moves:
+                board.push(move)
+            for _ in moves:
+                board.pop()
+
+    full_time = min(timeit.repeat(full, number=1, repeat=args.repeat)) / len(boards)
+    incremental_time = min(timeit.repeat(incremental, number=1, repeat=args.repeat)) / len(boards)
+    push_pop_time = min(timeit.repeat(push_pop, number=1, repeat=args.repeat)) / len(boards)
+
+    print(f"{len(boards)} positions")
+    print(f"ZobristHasher.__call__ (full scan): {full_time * 1e6:7.2f} us")
+    print(f"polyglot.zobrist_hash (incremental): {incremental_time * 1e6:7.2f} us "
+          f"({full_time / incremental_time:.1f}x faster)")
+    print(f"push + pop:                          {push_pop_time * 1e6:7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
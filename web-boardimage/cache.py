@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+#
+# web-boardimage is an HTTP service that renders chess board images.
+# Copyright (C) 2016-2017 Niklas Fiekas <niklas.fiekas@backscattering.de>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Render caches keyed by the ETag of a render"""
+
+import collections
+import logging
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """
+    Keeps rendered images in memory, evicting the least recently used ones
+    beyond *max_bytes*. Thread-safe, so renders can be stored directly from
+    the raster workers.
+    """
+
+    def __init__(self, *, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, etag):
+        with self._lock:
+            return etag in self._entries
+
+    def get(self, etag):
+        """Returns the cached image data or ``None``."""
+        with self._lock:
+            try:
+                self._entries.move_to_end(etag)
+            except KeyError:
+                return None
+            return self._entries[etag]
+
+    def put(self, etag, data):
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(etag, None)
+            if old is not None:
+                self.nbytes -= len(old)
+
+            self._entries[etag] = data
+            self.nbytes += len(data)
+
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+
+class DiskRenderCache:
+    """
+    Keeps rendered images as files in *root*, sharded by the first two
+    characters of the ETag, so that all server processes on a host can share
+    them and serve hits with ``sendfile``.
+
+    Files are written atomically. :func:`compact()` deletes the least
+    recently accessed files until the cache is below *max_bytes* again. It
+    is not called by :func:`put()`, but meant to run in the background every
+    *compact_interval* seconds. Access times are refreshed explicitly on
+    hits (at most every ``ATIME_RESOLUTION`` seconds), since many
+    filesystems are mounted with ``noatime`` or ``relatime``. Files accessed
+    within the last two ``ATIME_RESOLUTION`` periods are never deleted, so
+    that a hit is not removed before it has been sent.
+    """
+
+    ATIME_RESOLUTION = 60.0
+
+    def __init__(self, root, *, max_bytes=1024 * 1024 * 1024, compact_interval=60.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.compact_interval = compact_interval
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, etag):
+        return os.path.join(self.root, etag[:2], etag)
+
+    def __contains__(self, etag):
+        return os.path.exists(self.path(etag))
+
+    def get(self, etag):
+        """Returns the path of the cached image or ``None``."""
+        path = self.path(etag)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        now = time.time()
+        if now - st.st_atime >= self.ATIME_RESOLUTION:
+            try:
+                os.utime(path, (now, st.st_mtime))
+            except OSError:
+                pass  # Just evicted by another process.
+        return path
+
+    def put(self, etag, data):
+        path = self.path(etag)
+        shard = os.path.dirname(path)
+        os.makedirs(shard, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=shard, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def compact(self):
+        """
+        Deletes the least recently accessed files until the cache is at 90%
+        of *max_bytes*, as well as abandoned temporary files. Does nothing if
+        another process is already compacting. Returns the number of deleted
+        files.
+        """
+        with open(os.path.join(self.root, ".lock"), "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return 0
+
+            start = time.perf_counter()
+            now = time.time()
+            stale = now - 3600
+            recent = now - 2 * self.ATIME_RESOLUTION
+            entries = []
+            total = 0
+            deleted = 0
+            for shard in os.scandir(self.root):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    try:
+                        st = entry.stat()
+                        if entry.name.startswith("."):
+                            if st.st_mtime < stale:
+                                os.unlink(entry.path)
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_atime, st.st_size, entry.path))
+                    total += st.st_size
+
+            if total > self.max_bytes:
+                entries.sort()
+                for atime, size, path in entries:
+                    if total <= self.max_bytes * 0.9:
+                        break
+                    if atime >= recent:
+                        break  # Possibly being served right now.
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    deleted += 1
+
+                logger.info(
+                    "Compacted render cache %s in %.2fs: deleted %d of %d files, %.1f MiB left",
+                    self.root, time.perf_counter() - start, deleted, len(entries), total / (1024 * 1024),
+                )
+
+            return deleted
@@ -13,10 +13,11 @@ __email__ = "niklas.fiekas@backscattering.de"
 
 __version__ = "1.10.0"
 
+import array
 import collections
-import copy
 import dataclasses
 import enum
+import functools
 import math
 import re
 import itertools
@@ -531,19 +532,40 @@ def _carry_rippler(mask: Bitboard) -> Iterator[Bitboard]:
         if not subset:
             break
 
+def _ray_attacks(square: Square, delta: int) -> List[Tuple[Bitboard, Bitboard]]:
+    # Attacks along a single ray for each relevant occupancy of the ray.
+    ray = _sliding_attacks(square, BB_EMPTY, [delta])
+    ray_squares = [BB_SQUARES[sq] for sq in (scan_forward(ray) if delta > 0 else scan_reversed(ray))]
+
+    ray_attacks = []
+    for subset in _carry_rippler(ray & ~_edges(square)):
+        attacks = BB_EMPTY
+        for bb in ray_squares:
+            attacks |= bb
+            if subset & bb:
+                break
+        ray_attacks.append((subset, attacks))
+    return ray_attacks
+
 def _attack_table(deltas: List[int]) -> Tuple[List[Bitboard], List[Dict[Bitboard, Bitboard]]]:
     mask_table: List[Bitboard] = []
     attack_table: List[Dict[Bitboard, Bitboard]] = []
 
     for square in SQUARES:
-        attacks = {}
-
-        mask = _sliding_attacks(square, 0, deltas) & ~_edges(square)
-        for subset in _carry_rippler(mask):
-            attacks[subset] = _sliding_attacks(square, subset, deltas)
+        # The rays are independent, so combine the attacks of each ray for
+        # all occupancies, rather than sliding from scratch for every
+        # occupancy of the mask. This is most of the import time.
+        attacks = {BB_EMPTY: BB_EMPTY}
+        for delta in deltas:
+            ray_attacks = _ray_attacks(square, delta)
+            attacks = {
+                subset | ray_subset: attack | ray_attack
+                for subset, attack in attacks.items()
+                for ray_subset, ray_attack in ray_attacks
+            }
 
         attack_table.append(attacks)
-        mask_table.append(mask)
+        mask_table.append(_sliding_attacks(square, BB_EMPTY, deltas) & ~_edges(square))
 
     return mask_table, attack_table
 
@@ -583,9 +605,17 @@ SAN_REGEX = re.compile(r"^([NBKRQ])?([a-h])?([1-8])?[\-x]?([a-h][1-8])(=?[nbrqkN
 FEN_CASTLING_REGEX = re.compile(r"^(?:-|[KQABCDEFGH]{0,2}[kqabcdefgh]{0,2})\Z")
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class Piece:
-    """A piece with type and color."""
+    """
+    A piece with type and color.
+
+    Pieces are immutable, so that instances can be shared. For example,
+    :func:`chess.BaseBoard.piece_at()` always returns the same instance for
+    the same kind of piece.
+    """
+
+    __slots__ = ("piece_type", "color")
 
     piece_type: PieceType
     """The piece type."""
@@ -611,6 +641,15 @@ class Piece:
     def __hash__(self) -> int:
         return self.piece_type + (-1 if self.color else 5)
 
+    def __copy__(self) -> Self:
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> Self:
+        return self
+
+    def __reduce__(self) -> Tuple[Type[Piece], Tuple[PieceType, Color]]:
+        return type(self), (self.piece_type, self.color)
+
     def __repr__(self) -> str:
         return f"Piece.from_symbol({self.symbol()!r})"
 
@@ -628,30 +667,45 @@ class Piece:
 
         :raises: :exc:`ValueError` if the symbol is invalid.
         """
-        return cls(PIECE_SYMBOLS.index(symbol.lower()), symbol.isupper())
+        piece_type = PIECE_SYMBOLS.index(symbol.lower())
+        if cls is Piece and piece_type:
+            return _PIECES[symbol.isupper()][piece_type]
+        return cls(piece_type, symbol.isupper())
 
 
-@dataclasses.dataclass(unsafe_hash=True)
+@dataclasses.dataclass(init=False, frozen=True)
 class Move:
     """
     Represents a move from a square to a square and possibly the promotion
     piece type.
 
     Drops and null moves are supported.
+
+    Moves are immutable, so that instances can be shared. Move generation,
+    :func:`~chess.Move.from_uci()` and :func:`~chess.Move.from_packed()`
+    return the same instance for the same move.
     """
 
+    __slots__ = ("from_square", "to_square", "promotion", "drop")
+
     from_square: Square
     """The source square."""
 
     to_square: Square
     """The target square."""
 
-    promotion: Optional[PieceType] = None
+    promotion: Optional[PieceType]
     """The promotion piece type or ``None``."""
 
-    drop: Optional[PieceType] = None
+    drop: Optional[PieceType]
     """The drop piece type or ``None``."""
 
+    def __init__(self, from_square: Square, to_square: Square, promotion: Optional[PieceType] = None, drop: Optional[PieceType] = None) -> None:
+        object.__setattr__(self, "from_square", from_square)
+        object.__setattr__(self, "to_square", to_square)
+        object.__setattr__(self, "promotion", promotion)
+        object.__setattr__(self, "drop", drop)
+
     def uci(self) -> str:
         """
         Gets a UCI string for the move.
@@ -673,9 +727,33 @@ class Move:
     def xboard(self) -> str:
         return self.uci() if self else "@@@@"
 
+    def pack(self) -> int:
+        """
+        Packs the move into a 16-bit integer: the source square in bits 0-5,
+        the target square in bits 6-11 and the promotion piece type (or
+        ``0``) in bits 12-14. Drops set bit 15 and store the dropped piece
+        type instead of the promotion. The null move is ``0``.
+
+        Packed moves are compact enough to store in an :class:`array.array`
+        with type code ``H``, and can be used as keys and policy indexes.
+        See :func:`~chess.Move.from_packed()`.
+        """
+        if self.drop:
+            return 0x8000 | self.drop << 12 | self.to_square << 6 | self.to_square
+        return (self.promotion or 0) << 12 | self.to_square << 6 | self.from_square
+
     def __bool__(self) -> bool:
         return bool(self.from_square or self.to_square or self.promotion or self.drop)
 
+    def __copy__(self) -> Self:
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, object]) -> Self:
+        return self
+
+    def __reduce__(self) -> Tuple[Type[Move], Tuple[Square, Square, Optional[PieceType], Optional[PieceType]]]:
+        return type(self), (self.from_square, self.to_square, self.promotion, self.drop)
+
     def __repr__(self) -> str:
         return f"Move.from_uci({self.uci()!r})"
 
@@ -697,7 +775,7 @@ class Move:
                 square = SQUARE_NAMES.index(uci[2:])
             except ValueError:
                 raise InvalidMoveError(f"invalid uci: {uci!r}")
-            return cls(square, square, drop=drop)
+            return cls.from_packed(0x8000 | drop << 12 | square << 6 | square)
         elif 4 <= len(uci) <= 5:
             try:
                 from_square = SQUARE_NAMES.index(uci[0:2])
@@ -707,10 +785,40 @@ class Move:
                 raise InvalidMoveError(f"invalid uci: {uci!r}")
             if from_square == to_square:
                 raise InvalidMoveError(f"invalid uci (use 0000 for null moves): {uci!r}")
-            return cls(from_square, to_square, promotion=promotion)
+            return cls.from_packed((promotion or 0) << 12 | to_square << 6 | from_square)
         else:
             raise InvalidMoveError(f"expected uci string to be of length 4 or 5: {uci!r}")
 
+    @classmethod
+    def from_packed(cls, packed: int) -> Move:
+        """
+        Unpacks a move packed with :func:`~chess.Move.pack()`.
+
+        :raises: :exc:`InvalidMoveError` if *packed* is not a packed move.
+        """
+        piece_type = packed >> 12 & 7
+        if not 0 <= packed <= 0xffff or piece_type > KING:
+            raise InvalidMoveError(f"invalid packed move: {packed!r}")
+        if packed & 0x8000 and (not piece_type or packed & 0x3f != packed >> 6 & 0x3f):
+            # Drops need a piece type, and only one encoding per drop, so
+            # that they unpack to the interned instances.
+            raise InvalidMoveError(f"invalid packed move: {packed!r}")
+
+        if cls is Move:
+            move = _MOVES[packed]
+            if move is not None:
+                return move
+
+        to_square = packed >> 6 & 0x3f
+        if packed & 0x8000:
+            move = cls(to_square, to_square, drop=piece_type)
+        else:
+            move = cls(packed & 0x3f, to_square, piece_type or None)
+
+        if cls is Move:
+            _MOVES[packed] = move
+        return move
+
     @classmethod
     def null(cls) -> Move:
         """
@@ -725,7 +833,405 @@ class Move:
         >>> bool(chess.Move.null())
         False
         """
-        return cls(0, 0)
+        return cls.from_packed(0)
+
+
+def _intern_tables() -> Tuple[List[List[Optional[Piece]]], List[Optional[Move]]]:
+    pieces: List[List[Optional[Piece]]] = [[None] + [Piece(piece_type, color) for piece_type in PIECE_TYPES] for color in [BLACK, WHITE]]
+
+    # Indexed by packed move. Prefilled with all moves that move generation
+    # can yield (other than drops and king promotions), and the rest is
+    # added by Move.from_packed().
+    moves: List[Optional[Move]] = [None] * 0x10000
+    moves[0] = Move(0, 0)
+    for from_square in SQUARES:
+        for to_square in scan_forward(BB_KNIGHT_ATTACKS[from_square] | BB_RANK_ATTACKS[from_square][0] |
+                                      BB_FILE_ATTACKS[from_square][0] | BB_DIAG_ATTACKS[from_square][0]):
+            moves[to_square << 6 | from_square] = Move(from_square, to_square)
+    for from_rank, to_rank in [(6, 7), (1, 0)]:
+        for file_index in range(8):
+            from_square = square(file_index, from_rank)
+            for to_file in range(max(file_index - 1, 0), min(file_index + 1, 7) + 1):
+                to_square = square(to_file, to_rank)
+                for promotion in [KNIGHT, BISHOP, ROOK, QUEEN]:
+                    moves[promotion << 12 | to_square << 6 | from_square] = Move(from_square, to_square, promotion)
+
+    return pieces, moves
+
+_PIECES, _MOVES = _intern_tables()
+
+
+# Pseudo-random values for Zobrist hashing, compatible with the Polyglot
+# opening book format. See :func:`chess.polyglot.zobrist_hash()`.
+POLYGLOT_RANDOM_ARRAY = [
+    0x9D39247E33776D41, 0x2AF7398005AAA5C7, 0x44DB015024623547, 0x9C15F73E62A76AE2,
+    0x75834465489C0C89, 0x3290AC3A203001BF, 0x0FBBAD1F61042279, 0xE83A908FF2FB60CA,
+    0x0D7E765D58755C10, 0x1A083822CEAFE02D, 0x9605D5F0E25EC3B0, 0xD021FF5CD13A2ED5,
+    0x40BDF15D4A672E32, 0x011355146FD56395, 0x5DB4832046F3D9E5, 0x239F8B2D7FF719CC,
+    0x05D1A1AE85B49AA1, 0x679F848F6E8FC971, 0x7449BBFF801FED0B, 0x7D11CDB1C3B7ADF0,
+    0x82C7709E781EB7CC, 0xF3218F1C9510786C, 0x331478F3AF51BBE6, 0x4BB38DE5E7219443,
+    0xAA649C6EBCFD50FC, 0x8DBD98A352AFD40B, 0x87D2074B81D79217, 0x19F3C751D3E92AE1,
+    0xB4AB30F062B19ABF, 0x7B0500AC42047AC4, 0xC9452CA81A09D85D, 0x24AA6C514DA27500,
+    0x4C9F34427501B447, 0x14A68FD73C910841, 0xA71B9B83461CBD93, 0x03488B95B0F1850F,
+    0x637B2B34FF93C040, 0x09D1BC9A3DD90A94, 0x3575668334A1DD3B, 0x735E2B97A4C45A23,
+    0x18727070F1BD400B, 0x1FCBACD259BF02E7, 0xD310A7C2CE9B6555, 0xBF983FE0FE5D8244,
+    0x9F74D14F7454A824, 0x51EBDC4AB9BA3035, 0x5C82C505DB9AB0FA, 0xFCF7FE8A3430B241,
+    0x3253A729B9BA3DDE, 0x8C74C368081B3075, 0xB9BC6C87167C33E7, 0x7EF48F2B83024E20,
+    0x11D505D4C351BD7F, 0x6568FCA92C76A243, 0x4DE0B0F40F32A7B8, 0x96D693460CC37E5D,
+    0x42E240CB63689F2F, 0x6D2BDCDAE2919661, 0x42880B0236E4D951, 0x5F0F4A5898171BB6,
+    0x39F890F579F92F88, 0x93C5B5F47356388B, 0x63DC359D8D231B78, 0xEC16CA8AEA98AD76,
+    0x5355F900C2A82DC7, 0x07FB9F855A997142, 0x5093417AA8A7ED5E, 0x7BCBC38DA25A7F3C,
+    0x19FC8A768CF4B6D4, 0x637A7780DECFC0D9, 0x8249A47AEE0E41F7, 0x79AD695501E7D1E8,
+    0x14ACBAF4777D5776, 0xF145B6BECCDEA195, 0xDABF2AC8201752FC, 0x24C3C94DF9C8D3F6,
+    0xBB6E2924F03912EA, 0x0CE26C0B95C980D9, 0xA49CD132BFBF7CC4, 0xE99D662AF4243939,
+    0x27E6AD7891165C3F, 0x8535F040B9744FF1, 0x54B3F4FA5F40D873, 0x72B12C32127FED2B,
+    0xEE954D3C7B411F47, 0x9A85AC909A24EAA1, 0x70AC4CD9F04F21F5, 0xF9B89D3E99A075C2,
+    0x87B3E2B2B5C907B1, 0xA366E5B8C54F48B8, 0xAE4A9346CC3F7CF2, 0x1920C04D47267BBD,
+    0x87BF02C6B49E2AE9, 0x092237AC237F3859, 0xFF07F64EF8ED14D0, 0x8DE8DCA9F03CC54E,
+    0x9C1633264DB49C89, 0xB3F22C3D0B0B38ED, 0x390E5FB44D01144B, 0x5BFEA5B4712768E9,
+    0x1E1032911FA78984, 0x9A74ACB964E78CB3, 0x4F80F7A035DAFB04, 0x6304D09A0B3738C4,
+    0x2171E64683023A08, 0x5B9B63EB9CEFF80C, 0x506AACF489889342, 0x1881AFC9A3A701D6,
+    0x6503080440750644, 0xDFD395339CDBF4A7, 0xEF927DBCF00C20F2, 0x7B32F7D1E03680EC,
+    0xB9FD7620E7316243, 0x05A7E8A57DB91B77, 0xB5889C6E15630A75, 0x4A750A09CE9573F7,
+    0xCF464CEC899A2F8A, 0xF538639CE705B824, 0x3C79A0FF5580EF7F, 0xEDE6C87F8477609D,
+    0x799E81F05BC93F31, 0x86536B8CF3428A8C, 0x97D7374C60087B73, 0xA246637CFF328532,
+    0x043FCAE60CC0EBA0, 0x920E449535DD359E, 0x70EB093B15B290CC, 0x73A1921916591CBD,
+    0x56436C9FE1A1AA8D, 0xEFAC4B70633B8F81, 0xBB215798D45DF7AF, 0x45F20042F24F1768,
+    0x930F80F4E8EB7462, 0xFF6712FFCFD75EA1, 0xAE623FD67468AA70, 0xDD2C5BC84BC8D8FC,
+    0x7EED120D54CF2DD9, 0x22FE545401165F1C, 0xC91800E98FB99929, 0x808BD68E6AC10365,
+    0xDEC468145B7605F6, 0x1BEDE3A3AEF53302, 0x43539603D6C55602, 0xAA969B5C691CCB7A,
+    0xA87832D392EFEE56, 0x65942C7B3C7E11AE, 0xDED2D633CAD004F6, 0x21F08570F420E565,
+    0xB415938D7DA94E3C, 0x91B859E59ECB6350, 0x10CFF333E0ED804A, 0x28AED140BE0BB7DD,
+    0xC5CC1D89724FA456, 0x5648F680F11A2741, 0x2D255069F0B7DAB3, 0x9BC5A38EF729ABD4,
+    0xEF2F054308F6A2BC, 0xAF2042F5CC5C2858, 0x480412BAB7F5BE2A, 0xAEF3AF4A563DFE43,
+    0x19AFE59AE451497F, 0x52593803DFF1E840, 0xF4F076E65F2CE6F0, 0x11379625747D5AF3,
+    0xBCE5D2248682C115, 0x9DA4243DE836994F, 0x066F70B33FE09017, 0x4DC4DE189B671A1C,
+    0x51039AB7712457C3, 0xC07A3F80C31FB4B4, 0xB46EE9C5E64A6E7C, 0xB3819A42ABE61C87,
+    0x21A007933A522A20, 0x2DF16F761598AA4F, 0x763C4A1371B368FD, 0xF793C46702E086A0,
+    0xD7288E012AEB8D31, 0xDE336A2A4BC1C44B, 0x0BF692B38D079F23, 0x2C604A7A177326B3,
+    0x4850E73E03EB6064, 0xCFC447F1E53C8E1B, 0xB05CA3F564268D99, 0x9AE182C8BC9474E8,
+    0xA4FC4BD4FC5558CA, 0xE755178D58FC4E76, 0x69B97DB1A4C03DFE, 0xF9B5B7C4ACC67C96,
+    0xFC6A82D64B8655FB, 0x9C684CB6C4D24417, 0x8EC97D2917456ED0, 0x6703DF9D2924E97E,
+    0xC547F57E42A7444E, 0x78E37644E7CAD29E, 0xFE9A44E9362F05FA, 0x08BD35CC38336615,
+    0x9315E5EB3A129ACE, 0x94061B871E04DF75, 0xDF1D9F9D784BA010, 0x3BBA57B68871B59D,
+    0xD2B7ADEEDED1F73F, 0xF7A255D83BC373F8, 0xD7F4F2448C0CEB81, 0xD95BE88CD210FFA7,
+    0x336F52F8FF4728E7, 0xA74049DAC312AC71, 0xA2F61BB6E437FDB5, 0x4F2A5CB07F6A35B3,
+    0x87D380BDA5BF7859, 0x16B9F7E06C453A21, 0x7BA2484C8A0FD54E, 0xF3A678CAD9A2E38C,
+    0x39B0BF7DDE437BA2, 0xFCAF55C1BF8A4424, 0x18FCF680573FA594, 0x4C0563B89F495AC3,
+    0x40E087931A00930D, 0x8CFFA9412EB642C1, 0x68CA39053261169F, 0x7A1EE967D27579E2,
+    0x9D1D60E5076F5B6F, 0x3810E399B6F65BA2, 0x32095B6D4AB5F9B1, 0x35CAB62109DD038A,
+    0xA90B24499FCFAFB1, 0x77A225A07CC2C6BD, 0x513E5E634C70E331, 0x4361C0CA3F692F12,
+    0xD941ACA44B20A45B, 0x528F7C8602C5807B, 0x52AB92BEB9613989, 0x9D1DFA2EFC557F73,
+    0x722FF175F572C348, 0x1D1260A51107FE97, 0x7A249A57EC0C9BA2, 0x04208FE9E8F7F2D6,
+    0x5A110C6058B920A0, 0x0CD9A497658A5698, 0x56FD23C8F9715A4C, 0x284C847B9D887AAE,
+    0x04FEABFBBDB619CB, 0x742E1E651C60BA83, 0x9A9632E65904AD3C, 0x881B82A13B51B9E2,
+    0x506E6744CD974924, 0xB0183DB56FFC6A79, 0x0ED9B915C66ED37E, 0x5E11E86D5873D484,
+    0xF678647E3519AC6E, 0x1B85D488D0F20CC5, 0xDAB9FE6525D89021, 0x0D151D86ADB73615,
+    0xA865A54EDCC0F019, 0x93C42566AEF98FFB, 0x99E7AFEABE000731, 0x48CBFF086DDF285A,
+    0x7F9B6AF1EBF78BAF, 0x58627E1A149BBA21, 0x2CD16E2ABD791E33, 0xD363EFF5F0977996,
+    0x0CE2A38C344A6EED, 0x1A804AADB9CFA741, 0x907F30421D78C5DE, 0x501F65EDB3034D07,
+    0x37624AE5A48FA6E9, 0x957BAF61700CFF4E, 0x3A6C27934E31188A, 0xD49503536ABCA345,
+    0x088E049589C432E0, 0xF943AEE7FEBF21B8, 0x6C3B8E3E336139D3, 0x364F6FFA464EE52E,
+    0xD60F6DCEDC314222, 0x56963B0DCA418FC0, 0x16F50EDF91E513AF, 0xEF1955914B609F93,
+    0x565601C0364E3228, 0xECB53939887E8175, 0xBAC7A9A18531294B, 0xB344C470397BBA52,
+    0x65D34954DAF3CEBD, 0xB4B81B3FA97511E2, 0xB422061193D6F6A7, 0x071582401C38434D,
+    0x7A13F18BBEDC4FF5, 0xBC4097B116C524D2, 0x59B97885E2F2EA28, 0x99170A5DC3115544,
+    0x6F423357E7C6A9F9, 0x325928EE6E6F8794, 0xD0E4366228B03343, 0x565C31F7DE89EA27,
+    0x30F5611484119414, 0xD873DB391292ED4F, 0x7BD94E1D8E17DEBC, 0xC7D9F16864A76E94,
+    0x947AE053EE56E63C, 0xC8C93882F9475F5F, 0x3A9BF55BA91F81CA, 0xD9A11FBB3D9808E4,
+    0x0FD22063EDC29FCA, 0xB3F256D8ACA0B0B9, 0xB03031A8B4516E84, 0x35DD37D5871448AF,
+    0xE9F6082B05542E4E, 0xEBFAFA33D7254B59, 0x9255ABB50D532280, 0xB9AB4CE57F2D34F3,
+    0x693501D628297551, 0xC62C58F97DD949BF, 0xCD454F8F19C5126A, 0xBBE83F4ECC2BDECB,
+    0xDC842B7E2819E230, 0xBA89142E007503B8, 0xA3BC941D0A5061CB, 0xE9F6760E32CD8021,
+    0x09C7E552BC76492F, 0x852F54934DA55CC9, 0x8107FCCF064FCF56, 0x098954D51FFF6580,
+    0x23B70EDB1955C4BF, 0xC330DE426430F69D, 0x4715ED43E8A45C0A, 0xA8D7E4DAB780A08D,
+    0x0572B974F03CE0BB, 0xB57D2E985E1419C7, 0xE8D9ECBE2CF3D73F, 0x2FE4B17170E59750,
+    0x11317BA87905E790, 0x7FBF21EC8A1F45EC, 0x1725CABFCB045B00, 0x964E915CD5E2B207,
+    0x3E2B8BCBF016D66D, 0xBE7444E39328A0AC, 0xF85B2B4FBCDE44B7, 0x49353FEA39BA63B1,
+    0x1DD01AAFCD53486A, 0x1FCA8A92FD719F85, 0xFC7C95D827357AFA, 0x18A6A990C8B35EBD,
+    0xCCCB7005C6B9C28D, 0x3BDBB92C43B17F26, 0xAA70B5B4F89695A2, 0xE94C39A54A98307F,
+    0xB7A0B174CFF6F36E, 0xD4DBA84729AF48AD, 0x2E18BC1AD9704A68, 0x2DE0966DAF2F8B1C,
+    0xB9C11D5B1E43A07E, 0x64972D68DEE33360, 0x94628D38D0C20584, 0xDBC0D2B6AB90A559,
+    0xD2733C4335C6A72F, 0x7E75D99D94A70F4D, 0x6CED1983376FA72B, 0x97FCAACBF030BC24,
+    0x7B77497B32503B12, 0x8547EDDFB81CCB94, 0x79999CDFF70902CB, 0xCFFE1939438E9B24,
+    0x829626E3892D95D7, 0x92FAE24291F2B3F1, 0x63E22C147B9C3403, 0xC678B6D860284A1C,
+    0x5873888850659AE7, 0x0981DCD296A8736D, 0x9F65789A6509A440, 0x9FF38FED72E9052F,
+    0xE479EE5B9930578C, 0xE7F28ECD2D49EECD, 0x56C074A581EA17FE, 0x5544F7D774B14AEF,
+    0x7B3F0195FC6F290F, 0x12153635B2C0CF57, 0x7F5126DBBA5E0CA7, 0x7A76956C3EAFB413,
+    0x3D5774A11D31AB39, 0x8A1B083821F40CB4, 0x7B4A38E32537DF62, 0x950113646D1D6E03,
+    0x4DA8979A0041E8A9, 0x3BC36E078F7515D7, 0x5D0A12F27AD310D1, 0x7F9D1A2E1EBE1327,
+    0xDA3A361B1C5157B1, 0xDCDD7D20903D0C25, 0x36833336D068F707, 0xCE68341F79893389,
+    0xAB9090168DD05F34, 0x43954B3252DC25E5, 0xB438C2B67F98E5E9, 0x10DCD78E3851A492,
+    0xDBC27AB5447822BF, 0x9B3CDB65F82CA382, 0xB67B7896167B4C84, 0xBFCED1B0048EAC50,
+    0xA9119B60369FFEBD, 0x1FFF7AC80904BF45, 0xAC12FB171817EEE7, 0xAF08DA9177DDA93D,
+    0x1B0CAB936E65C744, 0xB559EB1D04E5E932, 0xC37B45B3F8D6F2BA, 0xC3A9DC228CAAC9E9,
+    0xF3B8B6675A6507FF, 0x9FC477DE4ED681DA, 0x67378D8ECCEF96CB, 0x6DD856D94D259236,
+    0xA319CE15B0B4DB31, 0x073973751F12DD5E, 0x8A8E849EB32781A5, 0xE1925C71285279F5,
+    0x74C04BF1790C0EFE, 0x4DDA48153C94938A, 0x9D266D6A1CC0542C, 0x7440FB816508C4FE,
+    0x13328503DF48229F, 0xD6BF7BAEE43CAC40, 0x4838D65F6EF6748F, 0x1E152328F3318DEA,
+    0x8F8419A348F296BF, 0x72C8834A5957B511, 0xD7A023A73260B45C, 0x94EBC8ABCFB56DAE,
+    0x9FC10D0F989993E0, 0xDE68A2355B93CAE6, 0xA44CFE79AE538BBE, 0x9D1D84FCCE371425,
+    0x51D2B1AB2DDFB636, 0x2FD7E4B9E72CD38C, 0x65CA5B96B7552210, 0xDD69A0D8AB3B546D,
+    0x604D51B25FBF70E2, 0x73AA8A564FB7AC9E, 0x1A8C1E992B941148, 0xAAC40A2703D9BEA0,
+    0x764DBEAE7FA4F3A6, 0x1E99B96E70A9BE8B, 0x2C5E9DEB57EF4743, 0x3A938FEE32D29981,
+    0x26E6DB8FFDF5ADFE, 0x469356C504EC9F9D, 0xC8763C5B08D1908C, 0x3F6C6AF859D80055,
+    0x7F7CC39420A3A545, 0x9BFB227EBDF4C5CE, 0x89039D79D6FC5C5C, 0x8FE88B57305E2AB6,
+    0xA09E8C8C35AB96DE, 0xFA7E393983325753, 0xD6B6D0ECC617C699, 0xDFEA21EA9E7557E3,
+    0xB67C1FA481680AF8, 0xCA1E3785A9E724E5, 0x1CFC8BED0D681639, 0xD18D8549D140CAEA,
+    0x4ED0FE7E9DC91335, 0xE4DBF0634473F5D2, 0x1761F93A44D5AEFE, 0x53898E4C3910DA55,
+    0x734DE8181F6EC39A, 0x2680B122BAA28D97, 0x298AF231C85BAFAB, 0x7983EED3740847D5,
+    0x66C1A2A1A60CD889, 0x9E17E49642A3E4C1, 0xEDB454E7BADC0805, 0x50B704CAB602C329,
+    0x4CC317FB9CDDD023, 0x66B4835D9EAFEA22, 0x219B97E26FFC81BD, 0x261E4E4C0A333A9D,
+    0x1FE2CCA76517DB90, 0xD7504DFA8816EDBB, 0xB9571FA04DC089C8, 0x1DDC0325259B27DE,
+    0xCF3F4688801EB9AA, 0xF4F5D05C10CAB243, 0x38B6525C21A42B0E, 0x36F60E2BA4FA6800,
+    0xEB3593803173E0CE, 0x9C4CD6257C5A3603, 0xAF0C317D32ADAA8A, 0x258E5A80C7204C4B,
+    0x8B889D624D44885D, 0xF4D14597E660F855, 0xD4347F66EC8941C3, 0xE699ED85B0DFB40D,
+    0x2472F6207C2D0484, 0xC2A1E7B5B459AEB5, 0xAB4F6451CC1D45EC, 0x63767572AE3D6174,
+    0xA59E0BD101731A28, 0x116D0016CB948F09, 0x2CF9C8CA052F6E9F, 0x0B090A7560A968E3,
+    0xABEEDDB2DDE06FF1, 0x58EFC10B06A2068D, 0xC6E57A78FBD986E0, 0x2EAB8CA63CE802D7,
+    0x14A195640116F336, 0x7C0828DD624EC390, 0xD74BBE77E6116AC7, 0x804456AF10F5FB53,
+    0xEBE9EA2ADF4321C7, 0x03219A39EE587A30, 0x49787FEF17AF9924, 0xA1E9300CD8520548,
+    0x5B45E522E4B1B4EF, 0xB49C3B3995091A36, 0xD4490AD526F14431, 0x12A8F216AF9418C2,
+    0x001F837CC7350524, 0x1877B51E57A764D5, 0xA2853B80F17F58EE, 0x993E1DE72D36D310,
+    0xB3598080CE64A656, 0x252F59CF0D9F04BB, 0xD23C8E176D113600, 0x1BDA0492E7E4586E,
+    0x21E0BD5026C619BF, 0x3B097ADAF088F94E, 0x8D14DEDB30BE846E, 0xF95CFFA23AF5F6F4,
+    0x3871700761B3F743, 0xCA672B91E9E4FA16, 0x64C8E531BFF53B55, 0x241260ED4AD1E87D,
+    0x106C09B972D2E822, 0x7FBA195410E5CA30, 0x7884D9BC6CB569D8, 0x0647DFEDCD894A29,
+    0x63573FF03E224774, 0x4FC8E9560F91B123, 0x1DB956E450275779, 0xB8D91274B9E9D4FB,
+    0xA2EBEE47E2FBFCE1, 0xD9F1F30CCD97FB09, 0xEFED53D75FD64E6B, 0x2E6D02C36017F67F,
+    0xA9AA4D20DB084E9B, 0xB64BE8D8B25396C1, 0x70CB6AF7C2D5BCF0, 0x98F076A4F7A2322E,
+    0xBF84470805E69B5F, 0x94C3251F06F90CF3, 0x3E003E616A6591E9, 0xB925A6CD0421AFF3,
+    0x61BDD1307C66E300, 0xBF8D5108E27E0D48, 0x240AB57A8B888B20, 0xFC87614BAF287E07,
+    0xEF02CDD06FFDB432, 0xA1082C0466DF6C0A, 0x8215E577001332C8, 0xD39BB9C3A48DB6CF,
+    0x2738259634305C14, 0x61CF4F94C97DF93D, 0x1B6BACA2AE4E125B, 0x758F450C88572E0B,
+    0x959F587D507A8359, 0xB063E962E045F54D, 0x60E8ED72C0DFF5D1, 0x7B64978555326F9F,
+    0xFD080D236DA814BA, 0x8C90FD9B083F4558, 0x106F72FE81E2C590, 0x7976033A39F7D952,
+    0xA4EC0132764CA04B, 0x733EA705FAE4FA77, 0xB4D8F77BC3E56167, 0x9E21F4F903B33FD9,
+    0x9D765E419FB69F6D, 0xD30C088BA61EA5EF, 0x5D94337FBFAF7F5B, 0x1A4E4822EB4D7A59,
+    0x6FFE73E81B637FB3, 0xDDF957BC36D8B9CA, 0x64D0E29EEA8838B3, 0x08DD9BDFD96B9F63,
+    0x087E79E5A57D1D13, 0xE328E230E3E2B3FB, 0x1C2559E30F0946BE, 0x720BF5F26F4D2EAA,
+    0xB0774D261CC609DB, 0x443F64EC5A371195, 0x4112CF68649A260E, 0xD813F2FAB7F5C5CA,
+    0x660D3257380841EE, 0x59AC2C7873F910A3, 0xE846963877671A17, 0x93B633ABFA3469F8,
+    0xC0C0F5A60EF4CDCF, 0xCAF21ECD4377B28C, 0x57277707199B8175, 0x506C11B9D90E8B1D,
+    0xD83CC2687A19255F, 0x4A29C6465A314CD1, 0xED2DF21216235097, 0xB5635C95FF7296E2,
+    0x22AF003AB672E811, 0x52E762596BF68235, 0x9AEBA33AC6ECC6B0, 0x944F6DE09134DFB6,
+    0x6C47BEC883A7DE39, 0x6AD047C430A12104, 0xA5B1CFDBA0AB4067, 0x7C45D833AFF07862,
+    0x5092EF950A16DA0B, 0x9338E69C052B8E7B, 0x455A4B4CFE30E3F5, 0x6B02E63195AD0CF8,
+    0x6B17B224BAD6BF27, 0xD1E0CCD25BB9C169, 0xDE0C89A556B9AE70, 0x50065E535A213CF6,
+    0x9C1169FA2777B874, 0x78EDEFD694AF1EED, 0x6DC93D9526A50E68, 0xEE97F453F06791ED,
+    0x32AB0EDB696703D3, 0x3A6853C7E70757A7, 0x31865CED6120F37D, 0x67FEF95D92607890,
+    0x1F2B1D1F15F6DC9C, 0xB69E38A8965C6B65, 0xAA9119FF184CCCF4, 0xF43C732873F24C13,
+    0xFB4A3D794A9A80D2, 0x3550C2321FD6109C, 0x371F77E76BB8417E, 0x6BFA9AAE5EC05779,
+    0xCD04F3FF001A4778, 0xE3273522064480CA, 0x9F91508BFFCFC14A, 0x049A7F41061A9E60,
+    0xFCB6BE43A9F2FE9B, 0x08DE8A1C7797DA9B, 0x8F9887E6078735A1, 0xB5B4071DBFC73A66,
+    0x230E343DFBA08D33, 0x43ED7F5A0FAE657D, 0x3A88A0FBBCB05C63, 0x21874B8B4D2DBC4F,
+    0x1BDEA12E35F6A8C9, 0x53C065C6C8E63528, 0xE34A1D250E7A8D6B, 0xD6B04D3B7651DD7E,
+    0x5E90277E7CB39E2D, 0x2C046F22062DC67D, 0xB10BB459132D0A26, 0x3FA9DDFB67E2F199,
+    0x0E09B88E1914F7AF, 0x10E8B35AF3EEAB37, 0x9EEDECA8E272B933, 0xD4C718BC4AE8AE5F,
+    0x81536D601170FC20, 0x91B534F885818A06, 0xEC8177F83F900978, 0x190E714FADA5156E,
+    0xB592BF39B0364963, 0x89C350C893AE7DC1, 0xAC042E70F8B383F2, 0xB49B52E587A1EE60,
+    0xFB152FE3FF26DA89, 0x3E666E6F69AE2C15, 0x3B544EBE544C19F9, 0xE805A1E290CF2456,
+    0x24B33C9D7ED25117, 0xE74733427B72F0C1, 0x0A804D18B7097475, 0x57E3306D881EDB4F,
+    0x4AE7D6A36EB5DBCB, 0x2D8D5432157064C8, 0xD1E649DE1E7F268B, 0x8A328A1CEDFE552C,
+    0x07A3AEC79624C7DA, 0x84547DDC3E203C94, 0x990A98FD5071D263, 0x1A4FF12616EEFC89,
+    0xF6F7FD1431714200, 0x30C05B1BA332F41C, 0x8D2636B81555A786, 0x46C9FEB55D120902,
+    0xCCEC0A73B49C9921, 0x4E9D2827355FC492, 0x19EBB029435DCB0F, 0x4659D2B743848A2C,
+    0x963EF2C96B33BE31, 0x74F85198B05A2E7D, 0x5A0F544DD2B1FB18, 0x03727073C2E134B1,
+    0xC7F6AA2DE59AEA61, 0x352787BAA0D7C22F, 0x9853EAB63B5E0B35, 0xABBDCDD7ED5C0860,
+    0xCF05DAF5AC8D77B0, 0x49CAD48CEBF4A71E, 0x7A4C10EC2158C4A6, 0xD9E92AA246BF719E,
+    0x13AE978D09FE5557, 0x730499AF921549FF, 0x4E4B705B92903BA4, 0xFF577222C14F0A3A,
+    0x55B6344CF97AAFAE, 0xB862225B055B6960, 0xCAC09AFBDDD2CDB4, 0xDAF8E9829FE96B5F,
+    0xB5FDFC5D3132C498, 0x310CB380DB6F7503, 0xE87FBB46217A360E, 0x2102AE466EBB1148,
+    0xF8549E1A3AA5E00D, 0x07A69AFDCC42261A, 0xC4C118BFE78FEAAE, 0xF9F4892ED96BD438,
+    0x1AF3DBE25D8F45DA, 0xF5B4B0B0D2DEEEB4, 0x962ACEEFA82E1C84, 0x046E3ECAAF453CE9,
+    0xF05D129681949A4C, 0x964781CE734B3C84, 0x9C2ED44081CE5FBD, 0x522E23F3925E319E,
+    0x177E00F9FC32F791, 0x2BC60A63A6F3B3F2, 0x222BBFAE61725606, 0x486289DDCC3D6780,
+    0x7DC7785B8EFDFC80, 0x8AF38731C02BA980, 0x1FAB64EA29A2DDF7, 0xE4D9429322CD065A,
+    0x9DA058C67844F20C, 0x24C0E332B70019B0, 0x233003B5A6CFE6AD, 0xD586BD01C5C217F6,
+    0x5E5637885F29BC2B, 0x7EBA726D8C94094B, 0x0A56A5F0BFE39272, 0xD79476A84EE20D06,
+    0x9E4C1269BAA4BF37, 0x17EFEE45B0DEE640, 0x1D95B0A5FCF90BC6, 0x93CBE0B699C2585D,
+    0x65FA4F227A2B6D79, 0xD5F9E858292504D5, 0xC2B5A03F71471A6F, 0x59300222B4561E00,
+    0xCE2F8642CA0712DC, 0x7CA9723FBB2E8988, 0x2785338347F2BA08, 0xC61BB3A141E50E8C,
+    0x150F361DAB9DEC26, 0x9F6A419D382595F4, 0x64A53DC924FE7AC9, 0x142DE49FFF7A7C3D,
+    0x0C335248857FA9E7, 0x0A9C32D5EAE45305, 0xE6C42178C4BBB92E, 0x71F1CE2490D20B07,
+    0xF1BCC3D275AFE51A, 0xE728E8C83C334074, 0x96FBF83A12884624, 0x81A1549FD6573DA5,
+    0x5FA7867CAF35E149, 0x56986E2EF3ED091B, 0x917F1DD5F8886C61, 0xD20D8C88C8FFE65F,
+    0x31D71DCE64B2C310, 0xF165B587DF898190, 0xA57E6339DD2CF3A0, 0x1EF6E6DBB1961EC9,
+    0x70CC73D90BC26E24, 0xE21A6B35DF0C3AD7, 0x003A93D8B2806962, 0x1C99DED33CB890A1,
+    0xCF3145DE0ADD4289, 0xD0E4427A5514FB72, 0x77C621CC9FB3A483, 0x67A34DAC4356550B,
+    0xF8D626AAAF278509
+]
+
+
+# The values for the pieces, indexed by color, piece type and square.
+_ZOBRIST_PIECES: List[List[List[int]]] = [
+    [[]] + [POLYGLOT_RANDOM_ARRAY[64 * (2 * piece_type - 2 + color):64 * (2 * piece_type - 1 + color)] for piece_type in PIECE_TYPES]
+    for color in [BLACK, WHITE]
+]
+
+
+# Piece type and color of the piece symbols in the board part of a FEN.
+_FEN_PIECES: Dict[str, Tuple[PieceType, Color]] = {
+    (symbol.upper() if color else symbol): (piece_type, color)
+    for color in COLORS
+    for piece_type, symbol in zip(PIECE_TYPES, PIECE_SYMBOLS[1:])
+}
+
+# Runs of empty squares in the board part of a FEN, longest first.
+_FEN_EMPTY_RUNS = [("1" * n, str(n)) for n in range(8, 1, -1)]
+
+# Castling parts of FENs that do not need the regex.
+_FEN_CASTLING_STANDARD = frozenset("".join(flag for i, flag in enumerate("KQkq") if mask & (1 << i)) or "-" for mask in range(16))
+
+_SQUARE_NAME_INDEXES: Dict[str, Square] = {name: square for square, name in enumerate(SQUARE_NAMES)}
+
+# Pawns, knights, bishops, rooks, queens, kings, white pieces, black pieces
+# and the Zobrist hash of the pieces.
+_ParsedBoard = Tuple[Bitboard, Bitboard, Bitboard, Bitboard, Bitboard, Bitboard, Bitboard, Bitboard, int]
+
+# The board, turn, castling rights, en passant square, half-move clock and
+# fullmove number.
+_ParsedFen = Tuple[_ParsedBoard, Color, Bitboard, Optional[Square], int, int]
+
+def _parse_board_fen(board_fen: str) -> Optional[_ParsedBoard]:
+    # Fast path for board parts without promoted pieces. Returns None for
+    # anything else, which is then validated (and rejected with a proper
+    # error message) by the general parser.
+    rows = board_fen.split("/")
+    if len(rows) != 8:
+        return None
+
+    bbs = [BB_EMPTY] * 7
+    occupied_co = [BB_EMPTY, BB_EMPTY]
+    zobrist_hash = 0
+
+    for rank_index, row in zip(range(7, -1, -1), rows):
+        square = 8 * rank_index
+        end = square + 8
+        previous_was_digit = False
+        for c in row:
+            if "1" <= c <= "8":
+                if previous_was_digit:
+                    return None
+                square += ord(c) - ord("0")
+                previous_was_digit = True
+            else:
+                try:
+                    piece_type, color = _FEN_PIECES[c]
+                except KeyError:
+                    return None
+                if square >= end:
+                    return None
+                mask = BB_SQUARES[square]
+                bbs[piece_type] |= mask
+                occupied_co[color] |= mask
+                zobrist_hash ^= _ZOBRIST_PIECES[color][piece_type][square]
+                square += 1
+                previous_was_digit = False
+        if square != end:
+            return None
+
+    return bbs[PAWN], bbs[KNIGHT], bbs[BISHOP], bbs[ROOK], bbs[QUEEN], bbs[KING], occupied_co[WHITE], occupied_co[BLACK], zobrist_hash
+
+def _castling_flag_rights(flag: str, color: Color, rooks: Bitboard, king: Optional[Square]) -> Bitboard:
+    # The castling rights for a lowercase flag of the castling part of a FEN,
+    # given the rooks and the king of the color.
+    backrank = BB_RANK_1 if color == WHITE else BB_RANK_8
+    rooks &= backrank
+
+    if flag == "q":
+        # Select the leftmost rook.
+        if king is not None and lsb(rooks) < king:
+            return rooks & -rooks
+        else:
+            return BB_FILE_A & backrank
+    elif flag == "k":
+        # Select the rightmost rook.
+        rook = msb(rooks)
+        if king is not None and king < rook:
+            return BB_SQUARES[rook]
+        else:
+            return BB_FILE_H & backrank
+    else:
+        return BB_FILES[FILE_NAMES.index(flag)] & backrank
+
+@functools.lru_cache(maxsize=4096)
+def _parse_fen(fen: str) -> Optional[_ParsedFen]:
+    # Fast path for FENs with exactly six parts, separated by single spaces,
+    # with castling rights like KQkq and without promoted pieces. Returns
+    # None for anything else. Recently parsed FENs are cached, because the
+    # same positions tend to be requested over and over.
+    parts = fen.split(" ")
+    if len(parts) != 6:
+        return None
+    board_part, turn_part, castling_part, ep_part, halfmove_part, fullmove_part = parts
+
+    board = _parse_board_fen(board_part)
+    if board is None:
+        return None
+
+    if turn_part == "w":
+        turn = WHITE
+    elif turn_part == "b":
+        turn = BLACK
+    else:
+        return None
+
+    if castling_part not in _FEN_CASTLING_STANDARD:
+        return None
+    castling_rights = BB_EMPTY
+    if castling_part != "-":
+        _, _, _, rooks, _, kings, white, black, _ = board
+        for flag in castling_part:
+            color = flag.isupper()
+            king_mask = kings & (white if color else black)
+            castling_rights |= _castling_flag_rights(flag.lower(), color, rooks & (white if color else black), msb(king_mask) if king_mask else None)
+
+    if ep_part == "-":
+        ep_square = None
+    else:
+        ep_square = _SQUARE_NAME_INDEXES.get(ep_part)
+        if ep_square is None:
+            return None
+
+    if not (halfmove_part.isascii() and halfmove_part.isdigit() and fullmove_part.isascii() and fullmove_part.isdigit()):
+        return None
+
+    return board, turn, castling_rights, ep_square, int(halfmove_part), max(int(fullmove_part), 1)
+
+
+# Piece type and color of the nibbles in the format of Board.to_bytes(), as
+# hex digits.
+_PACKED_PIECES: Dict[str, Tuple[PieceType, Color]] = {
+    f"{code:x}": piece for code, piece in enumerate((piece_type, color) for color in [WHITE, BLACK] for piece_type in PIECE_TYPES)
+}
+
+_ZOBRIST_PACKED: Dict[str, List[int]] = {code: _ZOBRIST_PIECES[color][piece_type] for code, (piece_type, color) in _PACKED_PIECES.items()}
+
+_PACKED_TURN = 1
+_PACKED_CHESS960 = 2
+_PACKED_PROMOTED = 4
+
+def _pack_varint(data: bytearray, n: int) -> None:
+    # Unsigned LEB128.
+    while n > 0x7f:
+        data.append(0x80 | (n & 0x7f))
+        n >>= 7
+    data.append(n)
+
+def _unpack_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    n = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[offset]
+        except IndexError:
+            raise ValueError(f"truncated packed board: {data!r}")
+        offset += 1
+        n |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return n, offset
 
 
 BaseBoardT = TypeVar("BaseBoardT", bound="BaseBoard")
@@ -738,6 +1244,14 @@ class BaseBoard:
     The board is initialized with the standard chess starting position, unless
     otherwise specified in the optional *board_fen* argument. If *board_fen*
     is ``None``, an empty board is created.
+
+    The board keeps the Polyglot Zobrist hash of its pieces up to date on
+    every change it makes. Code that assigns the bitboards (``pawns``,
+    ``knights``, ``bishops``, ``rooks``, ``queens``, ``kings``,
+    ``occupied_co`` and ``occupied``) directly must call
+    :func:`~chess.BaseBoard.recompute_zobrist_hash()` afterwards. Otherwise
+    :func:`chess.polyglot.zobrist_hash()` and repetition detection see a
+    stale hash.
     """
 
     def __init__(self, board_fen: Optional[str] = STARTING_BOARD_FEN) -> None:
@@ -764,6 +1278,8 @@ class BaseBoard:
         self.occupied_co[BLACK] = BB_RANK_7 | BB_RANK_8
         self.occupied = BB_RANK_1 | BB_RANK_2 | BB_RANK_7 | BB_RANK_8
 
+        self._zobrist_board = _ZOBRIST_STARTING_BOARD
+
     def reset_board(self) -> None:
         """
         Resets pieces to the starting position.
@@ -788,6 +1304,8 @@ class BaseBoard:
         self.occupied_co[BLACK] = BB_EMPTY
         self.occupied = BB_EMPTY
 
+        self._zobrist_board = 0
+
     def clear_board(self) -> None:
         """
         Clears the board.
@@ -828,7 +1346,7 @@ class BaseBoard:
         if piece_type:
             mask = BB_SQUARES[square]
             color = bool(self.occupied_co[WHITE] & mask)
-            return Piece(piece_type, color)
+            return _PIECES[color][piece_type]
         else:
             return None
 
@@ -1011,6 +1529,23 @@ class BaseBoard:
         """
         return self.pin_mask(color, square) != BB_ALL
 
+    def recompute_zobrist_hash(self) -> None:
+        """
+        Recomputes the Zobrist hash of the pieces from the bitboards. Only
+        needed after assigning the bitboards directly.
+        """
+        self._zobrist_board = self._hash_board()
+
+    def _hash_board(self) -> int:
+        # Polyglot Zobrist hash of the pieces. Kept up to date incrementally
+        # in _zobrist_board, so only needed when bitboards are set directly.
+        zobrist_hash = 0
+        for color, squares in enumerate(self.occupied_co):
+            for square in scan_reversed(squares):
+                piece_type = typing.cast(PieceType, self.piece_type_at(square))
+                zobrist_hash ^= _ZOBRIST_PIECES[color][piece_type][square]
+        return zobrist_hash
+
     def _remove_piece_at(self, square: Square) -> Optional[PieceType]:
         piece_type = self.piece_type_at(square)
         mask = BB_SQUARES[square]
@@ -1030,6 +1565,8 @@ class BaseBoard:
         else:
             return None
 
+        self._zobrist_board ^= _ZOBRIST_PIECES[bool(self.occupied_co[WHITE] & mask)][piece_type][square]
+
         self.occupied ^= mask
         self.occupied_co[WHITE] &= ~mask
         self.occupied_co[BLACK] &= ~mask
@@ -1047,7 +1584,7 @@ class BaseBoard:
         """
         color = bool(self.occupied_co[WHITE] & BB_SQUARES[square])
         piece_type = self._remove_piece_at(square)
-        return Piece(piece_type, color) if piece_type else None
+        return _PIECES[color][piece_type] if piece_type else None
 
     def _set_piece_at(self, square: Square, piece_type: PieceType, color: Color, promoted: bool = False) -> None:
         self._remove_piece_at(square)
@@ -1069,6 +1606,8 @@ class BaseBoard:
         else:
             return
 
+        self._zobrist_board ^= _ZOBRIST_PIECES[color][piece_type][square]
+
         self.occupied ^= mask
         self.occupied_co[color] ^= mask
 
@@ -1094,6 +1633,23 @@ class BaseBoard:
         Gets the board FEN (e.g.,
         ``rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR``).
         """
+        if promoted and self.promoted:
+            return self._board_fen_promoted()
+
+        # Place the pieces in FEN order (a8 to h1), then replace the runs of
+        # empty squares.
+        symbols = ["1"] * 64
+        white = self.occupied_co[WHITE]
+        for bb, symbol in [(self.pawns, "p"), (self.knights, "n"), (self.bishops, "b"), (self.rooks, "r"), (self.queens, "q"), (self.kings, "k")]:
+            for square in scan_reversed(bb):
+                symbols[square ^ 0x38] = symbol.upper() if BB_SQUARES[square] & white else symbol
+
+        board_fen = "/".join(["".join(symbols[i:i + 8]) for i in range(0, 64, 8)])
+        for run, digit in _FEN_EMPTY_RUNS:
+            board_fen = board_fen.replace(run, digit)
+        return board_fen
+
+    def _board_fen_promoted(self) -> str:
         builder: List[str] = []
         empty = 0
 
@@ -1107,7 +1663,7 @@ class BaseBoard:
                     builder.append(str(empty))
                     empty = 0
                 builder.append(piece.symbol())
-                if promoted and BB_SQUARES[square] & self.promoted:
+                if BB_SQUARES[square] & self.promoted:
                     builder.append("~")
 
             if BB_SQUARES[square] & BB_FILE_H:
@@ -1126,6 +1682,11 @@ class BaseBoard:
         if " " in fen:
             raise ValueError(f"expected position part of fen, got multiple parts: {fen!r}")
 
+        board = _parse_board_fen(fen)
+        if board is not None:
+            self._set_parsed_board(board)
+            return
+
         # Ensure the FEN is valid.
         rows = fen.split("/")
         if len(rows) != 8:
@@ -1174,6 +1735,12 @@ class BaseBoard:
             elif c == "~":
                 self.promoted |= BB_SQUARES[SQUARES_180[square_index - 1]]
 
+    def _set_parsed_board(self, board: _ParsedBoard) -> None:
+        (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings,
+         self.occupied_co[WHITE], self.occupied_co[BLACK], self._zobrist_board) = board
+        self.occupied = self.occupied_co[WHITE] | self.occupied_co[BLACK]
+        self.promoted = BB_EMPTY
+
     def set_board_fen(self, fen: str) -> None:
         """
         Parses *fen* and sets up the board, where *fen* is the board part of
@@ -1268,6 +1835,7 @@ class BaseBoard:
         self.occupied_co[BLACK] = BB_RANK_7 | BB_RANK_8
         self.occupied = BB_RANK_1 | BB_RANK_2 | BB_RANK_7 | BB_RANK_8
         self.promoted = BB_EMPTY
+        self._zobrist_board = self._hash_board()
 
     def set_chess960_pos(self, scharnagl: int) -> None:
         """
@@ -1454,6 +2022,7 @@ class BaseBoard:
         self.occupied_co[BLACK] = f(self.occupied_co[BLACK])
         self.occupied = f(self.occupied)
         self.promoted = f(self.promoted)
+        self._zobrist_board = self._hash_board()
 
     def transform(self, f: Callable[[Bitboard], Bitboard]) -> Self:
         """
@@ -1476,6 +2045,7 @@ class BaseBoard:
     def apply_mirror(self) -> None:
         self.apply_transform(flip_vertical)
         self.occupied_co[WHITE], self.occupied_co[BLACK] = self.occupied_co[BLACK], self.occupied_co[WHITE]
+        self._zobrist_board = self._hash_board()
 
     def mirror(self) -> Self:
         """
@@ -1506,6 +2076,7 @@ class BaseBoard:
         board.occupied_co[BLACK] = self.occupied_co[BLACK]
         board.occupied = self.occupied
         board.promoted = self.promoted
+        board._zobrist_board = self._zobrist_board
 
         return board
 
@@ -1540,9 +2111,36 @@ class BaseBoard:
         return board
 
 
+def _starting_board_zobrist() -> int:
+    board = BaseBoard.empty()
+    board._set_board_fen(STARTING_BOARD_FEN)
+    return board._zobrist_board
+
+_ZOBRIST_STARTING_BOARD = _starting_board_zobrist()
+
+
 BoardT = TypeVar("BoardT", bound="Board")
 
+class _PositionCache:
+    # Results that only depend on the position, memoized for one ply. See
+    # Board._position_cache().
+    __slots__ = ("key", "checkers", "has_legal_moves", "insufficient_material", "status")
+
+    def __init__(self, key: Hashable) -> None:
+        self.key = key
+        self.checkers: Optional[Bitboard] = None
+        self.has_legal_moves: Optional[bool] = None
+        self.insufficient_material: Optional[bool] = None
+        self.status: Optional[Status] = None
+
 class _BoardState:
+    # One per ply on the move stack, so keep them small.
+    __slots__ = (
+        "pawns", "knights", "bishops", "rooks", "queens", "kings",
+        "occupied_w", "occupied_b", "occupied", "promoted", "zobrist_board",
+        "turn", "castling_rights", "ep_square", "halfmove_clock", "fullmove_number",
+        "cache",
+    )
 
     def __init__(self, board: Board) -> None:
         self.pawns = board.pawns
@@ -1557,6 +2155,7 @@ class _BoardState:
         self.occupied = board.occupied
 
         self.promoted = board.promoted
+        self.zobrist_board = board._zobrist_board
 
         self.turn = board.turn
         self.castling_rights = board.castling_rights
@@ -1564,6 +2163,8 @@ class _BoardState:
         self.halfmove_clock = board.halfmove_clock
         self.fullmove_number = board.fullmove_number
 
+        self.cache = board._cache
+
     def restore(self, board: Board) -> None:
         board.pawns = self.pawns
         board.knights = self.knights
@@ -1577,6 +2178,7 @@ class _BoardState:
         board.occupied = self.occupied
 
         board.promoted = self.promoted
+        board._zobrist_board = self.zobrist_board
 
         board.turn = self.turn
         board.castling_rights = self.castling_rights
@@ -1584,6 +2186,8 @@ class _BoardState:
         board.halfmove_clock = self.halfmove_clock
         board.fullmove_number = self.fullmove_number
 
+        board._cache = self.cache
+
 class Board(BaseBoard):
     """
     A :class:`~chess.BaseBoard`, additional information representing
@@ -1702,6 +2306,7 @@ class Board(BaseBoard):
         self.ep_square = None
         self.move_stack = []
         self._stack: List[_BoardState] = []
+        self._cache: Optional[_PositionCache] = None
 
         if fen is None:
             self.clear()
@@ -1789,12 +2394,17 @@ class Board(BaseBoard):
     def root(self) -> Self:
         """Returns a copy of the root position."""
         if self._stack:
-            board = type(self)(None, chess960=self.chess960)
-            self._stack[0].restore(board)
-            return board
+            return self._stack_position(0)
         else:
             return self.copy(stack=False)
 
+    def _stack_position(self, index: int) -> Self:
+        # Copy (without move stack) of the position before the move at the
+        # given index of the move stack.
+        board = type(self)(None, chess960=self.chess960)
+        self._stack[index].restore(board)
+        return board
+
     def ply(self) -> int:
         """
         Returns the number of half-moves since the start of the game, as
@@ -1824,7 +2434,7 @@ class Board(BaseBoard):
         for from_square in scan_reversed(non_pawns):
             moves = self.attacks_mask(from_square) & ~our_pieces & to_mask
             for to_square in scan_reversed(moves):
-                yield Move(from_square, to_square)
+                yield _MOVES[to_square << 6 | from_square]
 
         # Generate castling moves.
         if from_mask & self.kings:
@@ -1844,12 +2454,12 @@ class Board(BaseBoard):
 
             for to_square in scan_reversed(targets):
                 if square_rank(to_square) in [0, 7]:
-                    yield Move(from_square, to_square, QUEEN)
-                    yield Move(from_square, to_square, ROOK)
-                    yield Move(from_square, to_square, BISHOP)
-                    yield Move(from_square, to_square, KNIGHT)
+                    yield _MOVES[QUEEN << 12 | to_square << 6 | from_square]
+                    yield _MOVES[ROOK << 12 | to_square << 6 | from_square]
+                    yield _MOVES[BISHOP << 12 | to_square << 6 | from_square]
+                    yield _MOVES[KNIGHT << 12 | to_square << 6 | from_square]
                 else:
-                    yield Move(from_square, to_square)
+                    yield _MOVES[to_square << 6 | from_square]
 
         # Prepare pawn advance generation.
         if self.turn == WHITE:
@@ -1867,17 +2477,17 @@ class Board(BaseBoard):
             from_square = to_square + (8 if self.turn == BLACK else -8)
 
             if square_rank(to_square) in [0, 7]:
-                yield Move(from_square, to_square, QUEEN)
-                yield Move(from_square, to_square, ROOK)
-                yield Move(from_square, to_square, BISHOP)
-                yield Move(from_square, to_square, KNIGHT)
+                yield _MOVES[QUEEN << 12 | to_square << 6 | from_square]
+                yield _MOVES[ROOK << 12 | to_square << 6 | from_square]
+                yield _MOVES[BISHOP << 12 | to_square << 6 | from_square]
+                yield _MOVES[KNIGHT << 12 | to_square << 6 | from_square]
             else:
-                yield Move(from_square, to_square)
+                yield _MOVES[to_square << 6 | from_square]
 
         # Generate double pawn moves.
         for to_square in scan_reversed(double_moves):
             from_square = to_square + (16 if self.turn == BLACK else -16)
-            yield Move(from_square, to_square)
+            yield _MOVES[to_square << 6 | from_square]
 
         # Generate en passant captures.
         if self.ep_square:
@@ -1896,7 +2506,7 @@ class Board(BaseBoard):
             BB_RANKS[4 if self.turn else 3])
 
         for capturer in scan_reversed(capturers):
-            yield Move(capturer, self.ep_square)
+            yield _MOVES[self.ep_square << 6 | capturer]
 
     def generate_pseudo_legal_captures(self, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[Move]:
         return itertools.chain(
@@ -1917,7 +2527,58 @@ class Board(BaseBoard):
 
     def is_check(self) -> bool:
         """Tests if the current side to move is in check."""
-        return bool(self.checkers_mask())
+        return bool(self._cached_checkers_mask())
+
+    def _position_key(self) -> Hashable:
+        # Everything the memoized results depend on. Compared rather than
+        # hashed, and made from the raw attributes, so that the cache can not
+        # go stale when they are assigned directly.
+        return (self.pawns, self.knights, self.bishops, self.rooks,
+                self.queens, self.kings,
+                self.occupied_co[WHITE], self.occupied_co[BLACK], self.promoted,
+                self.turn, self.castling_rights, self.ep_square, self.chess960)
+
+    def _position_cache(self) -> _PositionCache:
+        # The cache of the current position. The cache of each position on
+        # the move stack is saved with its board state, so that it is
+        # available again after pop().
+        key = self._position_key()
+        cache = self._cache
+        if cache is None or cache.key != key:
+            cache = self._cache = _PositionCache(key)
+        return cache
+
+    def _cached_checkers_mask(self) -> Bitboard:
+        cache = self._position_cache()
+        if cache.checkers is None:
+            cache.checkers = self.checkers_mask()
+        return cache.checkers
+
+    def _has_legal_moves(self) -> bool:
+        cache = self._position_cache()
+        if cache.has_legal_moves is None:
+            cache.has_legal_moves = self._any_legal_move()
+        return cache.has_legal_moves
+
+    def _any_legal_move(self) -> bool:
+        # Out of check, any move of a piece that is not pinned is legal. This
+        # usually finds one without starting the move generator. Variants
+        # with other legality rules fall back to the move generator.
+        king = self.king(self.turn)
+        if (king is not None and self.kings & self.occupied_co[self.turn] == BB_SQUARES[king] and
+                not self.is_variant_end() and not self._cached_checkers_mask()):
+            our_pieces = self.occupied_co[self.turn]
+            movers = our_pieces & ~self.kings & ~self._slider_blockers(king)
+            for from_square in scan_reversed(movers & ~self.pawns):
+                if self.attacks_mask(from_square) & ~our_pieces:
+                    return True
+
+            pawns = movers & self.pawns
+            single_moves = pawns << 8 if self.turn == WHITE else pawns >> 8
+            if single_moves & ~self.occupied & BB_ALL:
+                return True
+
+        return any(self.generate_legal_moves())
 
     def gives_check(self, move: Move) -> bool:
         """
@@ -2056,8 +2717,7 @@ class Board(BaseBoard):
         The game is not considered to be over by the
         :func:`fifty-move rule <chess.Board.can_claim_fifty_moves()>` or
         :func:`threefold repetition <chess.Board.can_claim_threefold_repetition()>`,
-        unless *claim_draw* is given. Note that checking the latter can be
-        slow.
+        unless *claim_draw* is given.
         """
         # Variant support.
         if self.is_variant_loss():
@@ -2072,7 +2732,7 @@ class Board(BaseBoard):
             return Outcome(Termination.CHECKMATE, not self.turn)
         if self.is_insufficient_material():
             return Outcome(Termination.INSUFFICIENT_MATERIAL, None)
-        if not any(self.generate_legal_moves()):
+        if not self._has_legal_moves():
             return Outcome(Termination.STALEMATE, None)
 
         # Automatic draws.
@@ -2095,7 +2755,7 @@ class Board(BaseBoard):
         if not self.is_check():
             return False
 
-        return not any(self.generate_legal_moves())
+        return not self._has_legal_moves()
 
     def is_stalemate(self) -> bool:
         """Checks if the current position is a stalemate."""
@@ -2105,14 +2765,17 @@ class Board(BaseBoard):
         if self.is_variant_end():
             return False
 
-        return not any(self.generate_legal_moves())
+        return not self._has_legal_moves()
 
     def is_insufficient_material(self) -> bool:
         """
         Checks if neither side has sufficient winning material
         (:func:`~chess.Board.has_insufficient_material()`).
         """
-        return all(self.has_insufficient_material(color) for color in COLORS)
+        cache = self._position_cache()
+        if cache.insufficient_material is None:
+            cache.insufficient_material = all(self.has_insufficient_material(color) for color in COLORS)
+        return cache.insufficient_material
 
     def has_insufficient_material(self, color: Color) -> bool:
         """
@@ -2150,7 +2813,7 @@ class Board(BaseBoard):
         return True
 
     def _is_halfmoves(self, n: int) -> bool:
-        return self.halfmove_clock >= n and any(self.generate_legal_moves())
+        return self.halfmove_clock >= n and self._has_legal_moves()
 
     def is_seventyfive_moves(self) -> bool:
         """
@@ -2174,8 +2837,6 @@ class Board(BaseBoard):
         """
         Checks if the player to move can claim a draw by the fifty-move rule or
         by threefold repetition.
-
-        Note that checking the latter can be slow.
         """
         return self.can_claim_fifty_moves() or self.can_claim_threefold_repetition()
 
@@ -2218,37 +2879,24 @@ class Board(BaseBoard):
         board occurred for the third time or if such a repetition is reached
         with one of the possible legal moves.
 
-        Note that checking this can be slow: In the worst case
-        scenario, every legal move has to be tested and the entire game has to
-        be replayed because there is no incremental transposition table.
+        Positions are compared by their Zobrist hashes, which are kept on the
+        move stack, so this only needs to push and pop each legal move once.
         """
-        transposition_key = self._transposition_key()
-        transpositions: Counter[Hashable] = collections.Counter()
-        transpositions.update((transposition_key, ))
-
-        # Count positions.
-        switchyard: List[Move] = []
-        while self.move_stack:
-            move = self.pop()
-            switchyard.append(move)
-
-            if self.is_irreversible(move):
-                break
-
-            transpositions.update((self._transposition_key(), ))
-
-        while switchyard:
-            self.push(switchyard.pop())
-
         # Threefold repetition occurred.
-        if transpositions[transposition_key] >= 3:
+        if self.is_repetition(3):
             return True
 
-        # The next legal move is a threefold repetition.
+        # The next legal move is a threefold repetition. Candidates are
+        # positions with the opponent to move, that occurred at least twice.
+        hashes: Counter[int] = collections.Counter(
+            self._stack[index].zobrist_board for index in self._reversible_stack_indexes(1))
+        if not any(count >= 2 for count in hashes.values()):
+            return False
+
         for move in self.generate_legal_moves():
             self.push(move)
             try:
-                if transpositions[self._transposition_key()] >= 2:
+                if hashes[self._zobrist_board] >= 2 and self.is_repetition(3):
                     return True
             finally:
                 self.pop()
@@ -2264,46 +2912,36 @@ class Board(BaseBoard):
         this does not consider a repetition that can be played on the next
         move.
 
-        Note that checking this can be slow: In the worst case, the entire
-        game has to be replayed because there is no incremental transposition
-        table.
-        """
-        # Fast check, based on occupancy only.
-        maybe_repetitions = 1
-        for state in reversed(self._stack):
-            if state.occupied == self.occupied:
-                maybe_repetitions += 1
-                if maybe_repetitions >= count:
-                    break
-        if maybe_repetitions < count:
+        Only positions since the last capture or pawn move with the same side
+        to move are scanned, comparing the Zobrist hashes on the move stack.
+        Matches are confirmed with an exact comparison.
+        """
+        if count <= 1:
+            return True
+
+        zobrist_board = self._zobrist_board
+        candidates = [
+            index for index in self._reversible_stack_indexes(2)
+            if self._stack[index].zobrist_board == zobrist_board
+        ]
+        if len(candidates) < count - 1:
             return False
 
-        # Check full replay.
         transposition_key = self._transposition_key()
-        switchyard: List[Move] = []
-
-        try:
-            while True:
+        for index in candidates:
+            if self._stack_position(index)._transposition_key() == transposition_key:
+                count -= 1
                 if count <= 1:
                     return True
 
-                if len(self.move_stack) < count - 1:
-                    break
-
-                move = self.pop()
-                switchyard.append(move)
-
-                if self.is_irreversible(move):
-                    break
-
-                if self._transposition_key() == transposition_key:
-                    count -= 1
-        finally:
-            while switchyard:
-                self.push(switchyard.pop())
-
         return False
 
+    def _reversible_stack_indexes(self, plies: int) -> range:
+        # Indexes of the move stack (from the top), whose positions could
+        # repeat the position the given number of plies after them.
+        # Positions before the last capture or pawn move can not repeat.
+        return range(len(self._stack) - plies, max(len(self._stack) - self.halfmove_clock, 0) - 1, -2)
+
     def _push_capture(self, move: Move, capture_square: Square, piece_type: PieceType, was_promoted: bool) -> None:
         pass
 
@@ -2566,6 +3204,13 @@ class Board(BaseBoard):
         :raises: :exc:`ValueError` if syntactically invalid. Use
             :func:`~chess.Board.is_valid()` to detect invalid positions.
         """
+        parsed = _parse_fen(fen)
+        if parsed is not None:
+            board, self.turn, self.castling_rights, self.ep_square, self.halfmove_clock, self.fullmove_number = parsed
+            self._set_parsed_board(board)
+            self.clear_stack()
+            return
+
         parts = fen.split()
 
         # Board part.
@@ -2665,26 +3310,7 @@ class Board(BaseBoard):
 
         for flag in castling_fen:
             color = WHITE if flag.isupper() else BLACK
-            flag = flag.lower()
-            backrank = BB_RANK_1 if color == WHITE else BB_RANK_8
-            rooks = self.occupied_co[color] & self.rooks & backrank
-            king = self.king(color)
-
-            if flag == "q":
-                # Select the leftmost rook.
-                if king is not None and lsb(rooks) < king:
-                    self.castling_rights |= rooks & -rooks
-                else:
-                    self.castling_rights |= BB_FILE_A & backrank
-            elif flag == "k":
-                # Select the rightmost rook.
-                rook = msb(rooks)
-                if king is not None and king < rook:
-                    self.castling_rights |= BB_SQUARES[rook]
-                else:
-                    self.castling_rights |= BB_FILE_H & backrank
-            else:
-                self.castling_rights |= BB_FILES[FILE_NAMES.index(flag)] & backrank
+            self.castling_rights |= _castling_flag_rights(flag.lower(), color, self.occupied_co[color] & self.rooks, self.king(color))
 
     def set_castling_fen(self, castling_fen: str) -> None:
         """
@@ -2698,6 +3324,109 @@ class Board(BaseBoard):
         self._set_castling_fen(castling_fen)
         self.clear_stack()
 
+    def to_bytes(self) -> bytes:
+        """
+        Packs the position into a compact binary format, for example to use
+        as a cache key or to send it to another process. The starting
+        position takes 30 bytes. The move stack is not included.
+
+        The format consists of:
+
+        * the occupied squares (8 bytes, little-endian),
+        * a nibble for each occupied square in ascending order, high nibble
+          first: ``piece_type - 1`` for white pieces and ``piece_type + 5``
+          for black pieces, padded with ``0``,
+        * a byte of flags: ``1`` if it is White's turn, ``2`` for
+          :data:`~chess.Board.chess960` and ``4`` if promoted pieces follow,
+        * the :data:`~chess.Board.ep_square` or ``255`` (1 byte),
+        * the castling rights on the first and on the eighth rank (1 byte
+          each, a bit for each file),
+        * the :data:`~chess.Board.halfmove_clock` and the
+          :data:`~chess.Board.fullmove_number` (unsigned LEB128, usually
+          1 byte each),
+        * the :data:`~chess.Board.promoted` pieces (8 bytes, little-endian),
+          only if there are any,
+
+        followed by the state of the variant, if any.
+
+        >>> import chess
+        >>>
+        >>> board = chess.Board()
+        >>> len(board.to_bytes())
+        30
+        >>> chess.Board.from_bytes(board.to_bytes()) == board
+        True
+        """
+        codes = ["0"] * 64
+        for code, (piece_type, color) in _PACKED_PIECES.items():
+            for square in scan_reversed(self.pieces_mask(piece_type, color)):
+                codes[square] = code
+        pieces = "".join([codes[square] for square in scan_forward(self.occupied)])
+        if len(pieces) % 2:
+            pieces += "0"
+
+        data = bytearray(self.occupied.to_bytes(8, "little"))
+        data.extend(bytes.fromhex(pieces))
+        data.append((_PACKED_TURN if self.turn else 0) | (_PACKED_CHESS960 if self.chess960 else 0) | (_PACKED_PROMOTED if self.promoted else 0))
+        data.append(255 if self.ep_square is None else self.ep_square)
+        data.append(self.castling_rights & BB_RANK_1)
+        data.append((self.castling_rights & BB_RANK_8) >> 56)
+        _pack_varint(data, self.halfmove_clock)
+        _pack_varint(data, self.fullmove_number)
+        if self.promoted:
+            data.extend(self.promoted.to_bytes(8, "little"))
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls: Type[BoardT], data: bytes) -> BoardT:
+        """
+        Unpacks a board from the format of :func:`~chess.Board.to_bytes()`.
+
+        :raises: :exc:`ValueError` if *data* is not a packed board.
+        """
+        if len(data) < 14:
+            raise ValueError(f"truncated packed board: {data!r}")
+
+        occupied = int.from_bytes(data[:8], "little")
+        count = popcount(occupied)
+        offset = 8 + (count + 1) // 2
+        if len(data) < offset + 6:
+            raise ValueError(f"truncated packed board: {data!r}")
+        pieces = data[8:offset].hex()
+        if count % 2 and pieces[-1] != "0":
+            raise ValueError(f"invalid padding in packed board: {data!r}")
+
+        bbs = dict.fromkeys(_PACKED_PIECES, BB_EMPTY)
+        zobrist_hash = 0
+        for square, code in zip(scan_forward(occupied), pieces):
+            try:
+                bbs[code] |= BB_SQUARES[square]
+            except KeyError:
+                raise ValueError(f"invalid piece in packed board: {data!r}")
+            zobrist_hash ^= _ZOBRIST_PACKED[code][square]
+        white = bbs["0"] | bbs["1"] | bbs["2"] | bbs["3"] | bbs["4"] | bbs["5"]
+
+        flags, ep_square, castling_w, castling_b = data[offset:offset + 4]
+        if flags & ~(_PACKED_TURN | _PACKED_CHESS960 | _PACKED_PROMOTED) or (ep_square > 63 and ep_square != 255):
+            raise ValueError(f"invalid packed board: {data!r}")
+        halfmove_clock, offset = _unpack_varint(data, offset + 4)
+        fullmove_number, offset = _unpack_varint(data, offset)
+
+        board = cls.empty(chess960=bool(flags & _PACKED_CHESS960))
+        board._set_parsed_board((bbs["0"] | bbs["6"], bbs["1"] | bbs["7"], bbs["2"] | bbs["8"], bbs["3"] | bbs["9"], bbs["4"] | bbs["a"], bbs["5"] | bbs["b"], white, occupied & ~white, zobrist_hash))
+        if flags & _PACKED_PROMOTED:
+            board.promoted = int.from_bytes(data[offset:offset + 8], "little")
+            offset += 8
+        if offset != len(data):
+            raise ValueError(f"invalid length of packed board: {data!r}")
+
+        board.turn = bool(flags & _PACKED_TURN)
+        board.ep_square = None if ep_square == 255 else ep_square
+        board.castling_rights = castling_w | (castling_b << 56)
+        board.halfmove_clock = halfmove_clock
+        board.fullmove_number = fullmove_number
+        return board
+
     def set_board_fen(self, fen: str) -> None:
         super().set_board_fen(fen)
         self.clear_stack()
@@ -3285,6 +4014,18 @@ class Board(BaseBoard):
         self.push(move)
         return move
 
+    def push_packed(self, packed: int) -> None:
+        """
+        Puts a move packed with :func:`~chess.Move.pack()` on the move stack.
+
+        .. warning::
+            Like with :func:`~chess.Board.push()`, moves are not checked for
+            legality.
+
+        :raises: :exc:`InvalidMoveError` if *packed* is not a packed move.
+        """
+        self.push(Move.from_packed(packed))
+
     def xboard(self, move: Move, chess960: Optional[bool] = None) -> str:
         if chess960 is None:
             chess960 = self.chess960
@@ -3511,6 +4252,12 @@ class Board(BaseBoard):
         :data:`~chess.STATUS_TOO_MANY_CHECKERS`,
         :data:`~chess.STATUS_IMPOSSIBLE_CHECK`.
         """
+        cache = self._position_cache()
+        if cache.status is None:
+            cache.status = self._status()
+        return cache.status
+
+    def _status(self) -> Status:
         errors = STATUS_VALID
 
         # There must be at least one piece.
@@ -3555,7 +4302,7 @@ class Board(BaseBoard):
             errors |= STATUS_OPPOSITE_CHECK
 
         # More than the maximum number of possible checkers in the variant.
-        checkers = self.checkers_mask()
+        checkers = self._cached_checkers_mask()
         our_kings = self.kings & self.occupied_co[self.turn] & ~self.promoted
         if checkers:
             if popcount(checkers) > 2:
@@ -3683,7 +4430,7 @@ class Board(BaseBoard):
 
         if BB_SQUARES[king] & from_mask:
             for to_square in scan_reversed(BB_KING_ATTACKS[king] & ~self.occupied_co[self.turn] & ~attacked & to_mask):
-                yield Move(king, to_square)
+                yield _MOVES[to_square << 6 | king]
 
         checker = msb(checkers)
         if BB_SQUARES[checker] == checkers:
@@ -3732,6 +4479,104 @@ class Board(BaseBoard):
             self.generate_legal_moves(from_mask, to_mask & self.occupied_co[not self.turn]),
             self.generate_legal_ep(from_mask, to_mask))
 
+    def _pseudo_legal_packed(self) -> List[int]:
+        # Like generate_pseudo_legal_moves(), but packed. Variants with
+        # other move generation override this.
+        return self._packed_moves(None, BB_EMPTY)
+
+    def _legal_packed(self) -> List[int]:
+        # Like generate_legal_moves(), but packed. Out of check, only moves
+        # of the king and of pinned pieces need to be checked, so those
+        # positions are generated from the bitboards directly. Variants
+        # with other legality rules override this.
+        if self.is_variant_end():
+            return []
+
+        king_mask = self.kings & self.occupied_co[self.turn]
+        if not king_mask:
+            return self._packed_moves(None, BB_EMPTY)
+
+        king = msb(king_mask)
+        if king_mask & (king_mask - 1) or self.attackers_mask(not self.turn, king):
+            # Not the override, which variants may extend with other moves.
+            return [move.pack() for move in Board.generate_legal_moves(self)]
+
+        return self._packed_moves(king, self._slider_blockers(king))
+
+    def _packed_moves(self, king: Optional[Square], blockers: Bitboard) -> List[int]:
+        # Packed moves in the order of generate_pseudo_legal_moves(). If a
+        # king is given, the side to move must not be in check, and only
+        # the legal moves are included.
+        packed: List[int] = []
+        our_pieces = self.occupied_co[self.turn]
+
+        # Piece moves.
+        for from_square in scan_reversed(our_pieces & ~self.pawns):
+            targets = self.attacks_mask(from_square) & ~our_pieces
+            if from_square == king:
+                for to_square in scan_reversed(targets):
+                    if not self.is_attacked_by(not self.turn, to_square):
+                        packed.append(to_square << 6 | from_square)
+            else:
+                if blockers & BB_SQUARES[from_square]:
+                    targets &= ray(typing.cast(Square, king), from_square)
+                for to_square in scan_reversed(targets):
+                    packed.append(to_square << 6 | from_square)
+
+        # Castling moves.
+        if self.kings:
+            packed.extend(move.pack() for move in self.generate_castling_moves())
+
+        # The remaining moves are all pawn moves.
+        pawns = self.pawns & our_pieces
+        if not pawns:
+            return packed
+
+        # Pawn captures.
+        for from_square in scan_reversed(pawns):
+            targets = BB_PAWN_ATTACKS[self.turn][from_square] & self.occupied_co[not self.turn]
+            if blockers & BB_SQUARES[from_square]:
+                targets &= ray(typing.cast(Square, king), from_square)
+            for to_square in scan_reversed(targets):
+                self._append_packed_pawn_move(packed, from_square, to_square)
+
+        # Pawn advances.
+        if self.turn == WHITE:
+            single_moves = pawns << 8 & ~self.occupied
+            double_moves = single_moves << 8 & ~self.occupied & (BB_RANK_3 | BB_RANK_4)
+        else:
+            single_moves = pawns >> 8 & ~self.occupied
+            double_moves = single_moves >> 8 & ~self.occupied & (BB_RANK_6 | BB_RANK_5)
+
+        # Pawns on the last rank would shift off the board.
+        single_moves &= BB_ALL
+
+        for to_square in scan_reversed(single_moves):
+            from_square = to_square + (8 if self.turn == BLACK else -8)
+            if not blockers & BB_SQUARES[from_square] or ray(typing.cast(Square, king), from_square) & BB_SQUARES[to_square]:
+                self._append_packed_pawn_move(packed, from_square, to_square)
+
+        for to_square in scan_reversed(double_moves):
+            from_square = to_square + (16 if self.turn == BLACK else -16)
+            if not blockers & BB_SQUARES[from_square] or ray(typing.cast(Square, king), from_square) & BB_SQUARES[to_square]:
+                packed.append(to_square << 6 | from_square)
+
+        # En passant captures.
+        if self.ep_square:
+            ep_moves = self.generate_pseudo_legal_ep() if king is None else self.generate_legal_ep()
+            packed.extend(move.pack() for move in ep_moves)
+
+        return packed
+
+    def _append_packed_pawn_move(self, packed: List[int], from_square: Square, to_square: Square) -> None:
+        if square_rank(to_square) in [0, 7]:
+            packed.append(QUEEN << 12 | to_square << 6 | from_square)
+            packed.append(ROOK << 12 | to_square << 6 | from_square)
+            packed.append(BISHOP << 12 | to_square << 6 | from_square)
+            packed.append(KNIGHT << 12 | to_square << 6 | from_square)
+        else:
+            packed.append(to_square << 6 | from_square)
+
     def _attacked_for_king(self, path: Bitboard, occupied: Bitboard) -> bool:
         return any(self.attackers_mask(not self.turn, sq, occupied) for sq in scan_reversed(path))
 
@@ -3769,28 +4614,32 @@ class Board(BaseBoard):
         if not chess960 and promotion is None and drop is None:
             if from_square == E1 and self.kings & BB_E1:
                 if to_square == H1:
-                    return Move(E1, G1)
+                    return _MOVES[G1 << 6 | E1]
                 elif to_square == A1:
-                    return Move(E1, C1)
+                    return _MOVES[C1 << 6 | E1]
             elif from_square == E8 and self.kings & BB_E8:
                 if to_square == H8:
-                    return Move(E8, G8)
+                    return _MOVES[G8 << 6 | E8]
                 elif to_square == A8:
-                    return Move(E8, C8)
+                    return _MOVES[C8 << 6 | E8]
 
+        if drop is None:
+            move = _MOVES[(promotion or 0) << 12 | to_square << 6 | from_square]
+            if move is not None:
+                return move
         return Move(from_square, to_square, promotion, drop)
 
     def _to_chess960(self, move: Move) -> Move:
         if move.from_square == E1 and self.kings & BB_E1:
             if move.to_square == G1 and not self.rooks & BB_G1:
-                return Move(E1, H1)
+                return _MOVES[H1 << 6 | E1]
             elif move.to_square == C1 and not self.rooks & BB_C1:
-                return Move(E1, A1)
+                return _MOVES[A1 << 6 | E1]
         elif move.from_square == E8 and self.kings & BB_E8:
             if move.to_square == G8 and not self.rooks & BB_G8:
-                return Move(E8, H8)
+                return _MOVES[H8 << 6 | E8]
             elif move.to_square == C8 and not self.rooks & BB_C8:
-                return Move(E8, A8)
+                return _MOVES[A8 << 6 | E8]
 
         return move
 
@@ -3860,7 +4709,10 @@ class Board(BaseBoard):
         Creates a copy of the board.
 
         Defaults to copying the entire move stack. Alternatively, *stack* can
-        be ``False``, or an integer to copy a limited number of moves.
+        be ``False``, or an integer to copy a limited number of moves. The
+        copy shares the moves and the saved board states of the move stack
+        with the original, since they are immutable, so copying the stack
+        only copies references.
         """
         board = super().copy()
 
@@ -3871,10 +4723,11 @@ class Board(BaseBoard):
         board.turn = self.turn
         board.fullmove_number = self.fullmove_number
         board.halfmove_clock = self.halfmove_clock
+        board._cache = self._cache
 
         if stack:
             stack = len(self.move_stack) if stack is True else stack
-            board.move_stack = [copy.copy(move) for move in self.move_stack[-stack:]]
+            board.move_stack = self.move_stack[-stack:]
             board._stack = self._stack[-stack:]
 
         return board
@@ -3911,12 +4764,21 @@ class PseudoLegalMoveGenerator:
         return any(self.board.generate_pseudo_legal_moves())
 
     def count(self) -> int:
-        # List conversion is faster than iterating.
-        return len(list(self))
+        # Packed generation is faster than creating the moves.
+        return len(self.board._pseudo_legal_packed())
 
     def __iter__(self) -> Iterator[Move]:
         return self.board.generate_pseudo_legal_moves()
 
+    def packed(self) -> array.array[int]:
+        """
+        Gets the moves packed with :func:`~chess.Move.pack()` in an
+        :class:`array.array` with type code ``H``, which takes 2 bytes per
+        move. The moves are generated as integers, without creating
+        :class:`~chess.Move` objects.
+        """
+        return array.array("H", self.board._pseudo_legal_packed())
+
     def __contains__(self, move: Move) -> bool:
         return self.board.is_pseudo_legal(move)
 
@@ -3939,15 +4801,24 @@ class LegalMoveGenerator:
         self.board = board
 
     def __bool__(self) -> bool:
-        return any(self.board.generate_legal_moves())
+        return self.board._has_legal_moves()
 
     def count(self) -> int:
-        # List conversion is faster than iterating.
-        return len(list(self))
+        # Packed generation is faster than creating the moves.
+        return len(self.board._legal_packed())
 
     def __iter__(self) -> Iterator[Move]:
         return self.board.generate_legal_moves()
 
+    def packed(self) -> array.array[int]:
+        """
+        Gets the moves packed with :func:`~chess.Move.pack()` in an
+        :class:`array.array` with type code ``H``, which takes 2 bytes per
+        move. Out of check, the moves are generated as integers, without
+        creating :class:`~chess.Move` objects.
+        """
+        return array.array("H", self.board._legal_packed())
+
     def __contains__(self, move: Move) -> bool:
         return self.board.is_legal(move)
 
@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import chess
+import typing
+
+import numpy as np
+import numpy.typing as npt
+
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+BitboardTuple = Tuple[chess.Bitboard, chess.Bitboard, chess.Bitboard, chess.Bitboard, chess.Bitboard, chess.Bitboard, chess.Bitboard, chess.Bitboard, chess.Color, chess.Bitboard, Optional[chess.Square]]
+"""
+A position as a tuple of pawns, knights, bishops, rooks, queens, kings,
+white pieces, black pieces, turn, castling rights and en passant square.
+See :func:`~chess.batch.bitboard_tuple()`.
+"""
+
+PositionLike = Union[chess.Board, BitboardTuple]
+
+PLANES = 15
+"""
+The number of planes per position:
+
+* 6 planes with the white pawns, knights, bishops, rooks, queens and kings,
+* 6 planes with the black pieces in the same order,
+* 1 plane that is all ones if it is White's turn, or all zeros otherwise,
+* 1 plane with the castling rights (the squares of the castling rooks, see
+  :data:`chess.Board.castling_rights`),
+* 1 plane with the en passant square, if any.
+"""
+
+_FILE_SHIFTS = np.arange(8, dtype=np.uint8)
+
+
+def bitboard_tuple(board: chess.Board) -> BitboardTuple:
+    """
+    Gets the tuple of bitboards that represents the position, which is
+    cheap to store, send to other processes and encode.
+    """
+    return (
+        board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+        board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK],
+        board.turn, board.clean_castling_rights(), board.ep_square,
+    )
+
+
+def _plane_bitboards(position: PositionLike) -> Tuple[chess.Bitboard, ...]:
+    if isinstance(position, chess.Board):
+        position = bitboard_tuple(position)
+
+    pawns, knights, bishops, rooks, queens, kings, white, black, turn, castling_rights, ep_square = position
+    return (
+        pawns & white, knights & white, bishops & white, rooks & white, queens & white, kings & white,
+        pawns & black, knights & black, bishops & black, rooks & black, queens & black, kings & black,
+        chess.BB_ALL if turn else chess.BB_EMPTY,
+        castling_rights,
+        chess.BB_EMPTY if ep_square is None else chess.BB_SQUARES[ep_square],
+    )
+
+
+_BB_ALL = np.uint64(chess.BB_ALL)
+_BB_EMPTY = np.uint64(chess.BB_EMPTY)
+_BB_LIGHT_SQUARES = np.uint64(chess.BB_LIGHT_SQUARES)
+_BB_DARK_SQUARES = np.uint64(chess.BB_DARK_SQUARES)
+_BB_NOT_FILE_A = np.uint64(chess.BB_ALL & ~chess.BB_FILE_A)
+_BB_NOT_FILE_AB = np.uint64(chess.BB_ALL & ~chess.BB_FILE_A & ~chess.BB_FILE_B)
+_BB_NOT_FILE_H = np.uint64(chess.BB_ALL & ~chess.BB_FILE_H)
+_BB_NOT_FILE_GH = np.uint64(chess.BB_ALL & ~chess.BB_FILE_G & ~chess.BB_FILE_H)
+
+# Directions as shifts (towards the 8th rank if positive) and the squares
+# that can be reached without wrapping around the edge of the board.
+_Directions = List[Tuple[int, np.uint64]]
+
+_DIAG_DIRECTIONS: _Directions = [(9, _BB_NOT_FILE_A), (7, _BB_NOT_FILE_H), (-7, _BB_NOT_FILE_A), (-9, _BB_NOT_FILE_H)]
+_ORTH_DIRECTIONS: _Directions = [(8, _BB_ALL), (1, _BB_NOT_FILE_A), (-1, _BB_NOT_FILE_H), (-8, _BB_ALL)]
+_KING_DIRECTIONS: _Directions = _DIAG_DIRECTIONS + _ORTH_DIRECTIONS
+_KNIGHT_DIRECTIONS: _Directions = [
+    (17, _BB_NOT_FILE_A), (15, _BB_NOT_FILE_H), (10, _BB_NOT_FILE_AB), (6, _BB_NOT_FILE_GH),
+    (-6, _BB_NOT_FILE_AB), (-10, _BB_NOT_FILE_GH), (-15, _BB_NOT_FILE_A), (-17, _BB_NOT_FILE_H),
+]
+_PAWN_DIRECTIONS: List[_Directions] = [
+    [(-7, _BB_NOT_FILE_A), (-9, _BB_NOT_FILE_H)],
+    [(9, _BB_NOT_FILE_A), (7, _BB_NOT_FILE_H)],
+]
+
+
+def _shift(bbs: np.ndarray, shift: int) -> np.ndarray:
+    return bbs << np.uint64(shift) if shift > 0 else bbs >> np.uint64(-shift)
+
+
+def _step_attacks(bbs: np.ndarray, directions: _Directions) -> np.ndarray:
+    attacks = np.zeros_like(bbs)
+    for shift, mask in directions:
+        attacks |= _shift(bbs, shift) & mask
+    return attacks
+
+
+def _slider_attacks(bbs: np.ndarray, empty: np.ndarray, directions: _Directions) -> np.ndarray:
+    # Kogge-Stone fills, see
+    # https://www.chessprogramming.org/Kogge-Stone_Algorithm.
+    attacks = np.zeros_like(bbs)
+    for shift, mask in directions:
+        propagator = empty & mask
+        bbs_fill = bbs | (propagator & _shift(bbs, shift))
+        propagator &= _shift(propagator, shift)
+        bbs_fill |= propagator & _shift(bbs_fill, 2 * shift)
+        propagator &= _shift(propagator, 2 * shift)
+        bbs_fill |= propagator & _shift(bbs_fill, 4 * shift)
+        attacks |= _shift(bbs_fill, shift) & mask
+    return attacks
+
+
+_POPCOUNT_BYTES = np.array([chess.popcount(byte) for byte in range(256)], dtype=np.uint8)
+
+def _popcount_bytes(bbs: np.ndarray) -> np.ndarray:
+    bbs = np.ascontiguousarray(bbs, dtype=np.uint64)
+    return _POPCOUNT_BYTES[bbs.view(np.uint8)].reshape(bbs.shape + (8, )).sum(axis=-1, dtype=np.uint8)
+
+_popcount: Callable[[np.ndarray], np.ndarray] = getattr(np, "bitwise_count", _popcount_bytes)
+
+
+class PositionBatch:
+    """
+    A batch of positions of standard chess or Chess960, stored as parallel
+    NumPy arrays with one entry per position, and vectorized kernels that
+    work on all positions at once. This is much faster and more compact than
+    a list of :class:`~chess.Board` objects, when only features of the
+    positions are needed.
+
+    The arrays are *pawns*, *knights*, *bishops*, *rooks*, *queens*,
+    *kings*, *occupied_co* (indexed by color, like
+    :data:`chess.Board.occupied_co`) and *castling_rights* with bitboards as
+    ``uint64``, *turn* as ``bool`` and *ep_square* as ``int8``, with ``-1``
+    if there is no en passant square. Move counters and move stacks are not
+    kept.
+
+    >>> import chess
+    >>> import chess.batch
+    >>>
+    >>> batch = chess.batch.PositionBatch.from_fens([
+    ...     chess.STARTING_FEN,
+    ...     "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",
+    ... ])
+    >>> batch.is_check()
+    array([False,  True])
+    >>> batch.piece_counts(chess.BLACK)[1]  # Pawns, knights, bishops, rooks, queens, kings
+    array([8, 2, 2, 2, 1, 1], dtype=uint8)
+    """
+
+    def __init__(self, size: int = 0) -> None:
+        self.pawns = np.zeros(size, dtype=np.uint64)
+        self.knights = np.zeros(size, dtype=np.uint64)
+        self.bishops = np.zeros(size, dtype=np.uint64)
+        self.rooks = np.zeros(size, dtype=np.uint64)
+        self.queens = np.zeros(size, dtype=np.uint64)
+        self.kings = np.zeros(size, dtype=np.uint64)
+        self.occupied_co = [np.zeros(size, dtype=np.uint64), np.zeros(size, dtype=np.uint64)]
+        self.turn = np.ones(size, dtype=bool)
+        self.castling_rights = np.zeros(size, dtype=np.uint64)
+        self.ep_square = np.full(size, -1, dtype=np.int8)
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[PositionLike]) -> PositionBatch:
+        """
+        Creates a batch from boards or tuples of bitboards (see
+        :func:`~chess.batch.bitboard_tuple()`).
+        """
+        rows = [bitboard_tuple(position) if isinstance(position, chess.Board) else position for position in positions]
+        batch = cls(len(rows))
+        if rows:
+            pawns, knights, bishops, rooks, queens, kings, white, black, turn, castling_rights, ep_square = zip(*rows)
+            batch.pawns[:] = pawns
+            batch.knights[:] = knights
+            batch.bishops[:] = bishops
+            batch.rooks[:] = rooks
+            batch.queens[:] = queens
+            batch.kings[:] = kings
+            batch.occupied_co[chess.WHITE][:] = white
+            batch.occupied_co[chess.BLACK][:] = black
+            batch.turn[:] = turn
+            batch.castling_rights[:] = castling_rights
+            batch.ep_square[:] = [-1 if square is None else square for square in ep_square]
+        return batch
+
+    @classmethod
+    def from_fens(cls, fens: Iterable[str], *, chess960: bool = False) -> PositionBatch:
+        """
+        Creates a batch from FENs, without keeping a board for each of them.
+
+        :raises: :exc:`ValueError` if any of the FENs is invalid.
+        """
+        board = chess.Board(chess960=chess960)
+        rows = []
+        for fen in fens:
+            board.set_fen(fen)
+            rows.append(bitboard_tuple(board))
+        return cls.from_positions(rows)
+
+    def __len__(self) -> int:
+        return len(self.turn)
+
+    @typing.overload
+    def __getitem__(self, index: int) -> chess.Board: ...
+    @typing.overload
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> PositionBatch: ...
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union[chess.Board, PositionBatch]:
+        """
+        Gets the board at an integer *index*, or a new batch with the
+        positions selected by a slice, an array of indexes or a boolean mask,
+        like ``batch[batch.is_check()]``.
+        """
+        if isinstance(index, (int, np.integer)):
+            return self.board(int(index))
+
+        batch = type(self)()
+        batch.pawns = self.pawns[index]
+        batch.knights = self.knights[index]
+        batch.bishops = self.bishops[index]
+        batch.rooks = self.rooks[index]
+        batch.queens = self.queens[index]
+        batch.kings = self.kings[index]
+        batch.occupied_co = [self.occupied_co[chess.BLACK][index], self.occupied_co[chess.WHITE][index]]
+        batch.turn = self.turn[index]
+        batch.castling_rights = self.castling_rights[index]
+        batch.ep_square = self.ep_square[index]
+        return batch
+
+    def bitboard_tuple(self, index: int) -> BitboardTuple:
+        """Gets the tuple of bitboards of the position at *index*."""
+        ep_square = int(self.ep_square[index])
+        return (
+            int(self.pawns[index]), int(self.knights[index]), int(self.bishops[index]),
+            int(self.rooks[index]), int(self.queens[index]), int(self.kings[index]),
+            int(self.occupied_co[chess.WHITE][index]), int(self.occupied_co[chess.BLACK][index]),
+            bool(self.turn[index]), int(self.castling_rights[index]), None if ep_square < 0 else ep_square,
+        )
+
+    def board(self, index: int, *, chess960: bool = False) -> chess.Board:
+        """
+        Creates a board for the position at *index*.
+
+        The batch does not keep the move clocks, so the board has a
+        :data:`~chess.Board.halfmove_clock` of ``0`` and a
+        :data:`~chess.Board.fullmove_number` of ``1``.
+        """
+        pawns, knights, bishops, rooks, queens, kings, white, black, turn, castling_rights, ep_square = self.bitboard_tuple(index)
+        board = chess.Board(None, chess960=chess960)
+        board.pawns = pawns
+        board.knights = knights
+        board.bishops = bishops
+        board.rooks = rooks
+        board.queens = queens
+        board.kings = kings
+        board.occupied_co[chess.WHITE] = white
+        board.occupied_co[chess.BLACK] = black
+        board.occupied = white | black
+        board.recompute_zobrist_hash()
+        board.turn = turn
+        board.castling_rights = castling_rights
+        board.ep_square = ep_square
+        return board
+
+    @property
+    def occupied(self) -> np.ndarray:
+        return self.occupied_co[chess.WHITE] | self.occupied_co[chess.BLACK]
+
+    def pieces_mask(self, piece_type: chess.PieceType, color: chess.Color) -> np.ndarray:
+        if piece_type == chess.PAWN:
+            bbs = self.pawns
+        elif piece_type == chess.KNIGHT:
+            bbs = self.knights
+        elif piece_type == chess.BISHOP:
+            bbs = self.bishops
+        elif piece_type == chess.ROOK:
+            bbs = self.rooks
+        elif piece_type == chess.QUEEN:
+            bbs = self.queens
+        elif piece_type == chess.KING:
+            bbs = self.kings
+        else:
+            assert False, f"expected PieceType, got {piece_type!r}"
+
+        return bbs & self.occupied_co[color]
+
+    def piece_counts(self, color: chess.Color) -> np.ndarray:
+        """
+        Counts the pieces of the given color. Returns an array of shape
+        ``(N, 6)``, with the number of pawns, knights, bishops, rooks,
+        queens and kings.
+        """
+        return np.stack([_popcount(self.pieces_mask(piece_type, color)) for piece_type in chess.PIECE_TYPES], axis=-1)
+
+    def attacked_mask(self, color: chess.Color) -> np.ndarray:
+        """
+        Gets the squares attacked by the given side, including squares
+        occupied by its own pieces. Pinned pieces still count as attackers.
+        """
+        pieces = self.occupied_co[color]
+        empty = ~self.occupied
+        return (
+            _step_attacks(self.pawns & pieces, _PAWN_DIRECTIONS[color]) |
+            _step_attacks(self.knights & pieces, _KNIGHT_DIRECTIONS) |
+            _step_attacks(self.kings & pieces, _KING_DIRECTIONS) |
+            _slider_attacks((self.bishops | self.queens) & pieces, empty, _DIAG_DIRECTIONS) |
+            _slider_attacks((self.rooks | self.queens) & pieces, empty, _ORTH_DIRECTIONS))
+
+    def checkers_mask(self) -> np.ndarray:
+        """Gets the pieces giving check to the side to move."""
+        white, black = self.occupied_co[chess.WHITE], self.occupied_co[chess.BLACK]
+        kings = self.kings & np.where(self.turn, white, black)
+        empty = ~self.occupied
+
+        # Attack outwards from the kings to find the attackers.
+        attackers = (
+            (np.where(self.turn, _step_attacks(kings, _PAWN_DIRECTIONS[chess.WHITE]), _step_attacks(kings, _PAWN_DIRECTIONS[chess.BLACK])) & self.pawns) |
+            (_step_attacks(kings, _KNIGHT_DIRECTIONS) & self.knights) |
+            (_step_attacks(kings, _KING_DIRECTIONS) & self.kings) |
+            (_slider_attacks(kings, empty, _DIAG_DIRECTIONS) & (self.bishops | self.queens)) |
+            (_slider_attacks(kings, empty, _ORTH_DIRECTIONS) & (self.rooks | self.queens)))
+
+        return attackers & np.where(self.turn, black, white)
+
+    def is_check(self) -> np.ndarray:
+        """Tests if the side to move is in check."""
+        return self.checkers_mask() != _BB_EMPTY
+
+    def is_insufficient_material(self) -> np.ndarray:
+        """
+        Checks if neither side has sufficient winning material, like
+        :func:`chess.Board.is_insufficient_material()`.
+        """
+        return self.has_insufficient_material(chess.WHITE) & self.has_insufficient_material(chess.BLACK)
+
+    def has_insufficient_material(self, color: chess.Color) -> np.ndarray:
+        """
+        Checks if *color* has insufficient winning material, like
+        :func:`chess.Board.has_insufficient_material()`.
+        """
+        ours, theirs = self.occupied_co[color], self.occupied_co[not color]
+
+        knights = (_popcount(ours) <= 2) & ((theirs & ~self.kings & ~self.queens) == _BB_EMPTY)
+
+        same_color = ((self.bishops & _BB_DARK_SQUARES) == _BB_EMPTY) | ((self.bishops & _BB_LIGHT_SQUARES) == _BB_EMPTY)
+        bishops = same_color & (self.pawns == _BB_EMPTY) & (self.knights == _BB_EMPTY)
+
+        return (
+            ((ours & (self.pawns | self.rooks | self.queens)) == _BB_EMPTY) &
+            np.where((ours & self.knights) != _BB_EMPTY, knights,
+                     np.where((ours & self.bishops) != _BB_EMPTY, bishops, True)))
+
+
+def _fill_plane_bitboards(batch: PositionBatch, bitboards: np.ndarray) -> None:
+    for color, offset in [(chess.WHITE, 0), (chess.BLACK, 6)]:
+        for piece_type in chess.PIECE_TYPES:
+            bitboards[:, offset + piece_type - 1] = batch.pieces_mask(piece_type, color)
+    bitboards[:, 12] = np.where(batch.turn, _BB_ALL, _BB_EMPTY)
+    bitboards[:, 13] = batch.castling_rights
+    bitboards[:, 14] = np.where(batch.ep_square >= 0, np.uint64(1) << np.maximum(batch.ep_square, 0).astype(np.uint64), _BB_EMPTY)
+
+
+class PlaneEncoder:
+    """
+    Encodes batches of up to *batch_size* positions as arrays of shape
+    ``(N, PLANES, 8, 8)`` and the given *dtype*, for example as the input
+    of a neural network. ``planes[n, plane, rank, file]`` is ``1`` if the
+    square is set in the plane, so rank 1 comes first, from White's point of
+    view. See :data:`~chess.batch.PLANES` for the order of the planes.
+
+    The encoder keeps its buffers, so that encoding repeated batches does
+    not allocate.
+
+    >>> import chess
+    >>> import chess.batch
+    >>>
+    >>> encoder = chess.batch.PlaneEncoder(256)
+    >>> planes = encoder.encode([chess.Board()])
+    >>> planes.shape
+    (1, 15, 8, 8)
+    >>> planes[0, 0, 1]  # White pawns on the second rank
+    array([1., 1., 1., 1., 1., 1., 1., 1.], dtype=float32)
+    """
+
+    def __init__(self, batch_size: int, *, dtype: npt.DTypeLike = np.float32) -> None:
+        self.batch_size = batch_size
+        self.dtype = np.dtype(dtype)
+        self._out = np.zeros((batch_size, PLANES, 8, 8), dtype=self.dtype)
+        self._bitboards = np.zeros((batch_size, PLANES), dtype="<u8")
+        self._bits = self._out if self.dtype == np.uint8 else np.zeros((batch_size, PLANES, 8, 8), dtype=np.uint8)
+
+    def encode(self, positions: Union[Sequence[PositionLike], PositionBatch], *, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encodes the given boards, tuples of bitboards (see
+        :func:`~chess.batch.bitboard_tuple()`) or
+        :class:`~chess.batch.PositionBatch`.
+
+        Returns a view of the internal buffer, which is overwritten by the
+        next call, unless an array of shape ``(N, PLANES, 8, 8)`` is given
+        as *out*.
+
+        :raises: :exc:`ValueError` if there are more than *batch_size*
+            positions.
+        """
+        n = len(positions)
+        if n > self.batch_size:
+            raise ValueError(f"expected at most {self.batch_size} positions, got {n}")
+
+        bitboards = self._bitboards[:n]
+        if isinstance(positions, PositionBatch):
+            _fill_plane_bitboards(positions, bitboards)
+        else:
+            for index, position in enumerate(positions):
+                bitboards[index] = _plane_bitboards(position)
+
+        # The bytes of little-endian bitboards are the ranks, and their bits
+        # are the files.
+        bits = self._bits[:n]
+        np.right_shift(bitboards.view(np.uint8).reshape(n, PLANES, 8, 1), _FILE_SHIFTS, out=bits)
+        np.bitwise_and(bits, 1, out=bits)
+
+        if out is None:
+            out = self._out[:n]
+        if out is not bits:
+            np.copyto(out, bits, casting="unsafe")
+        return out
+
+
+def encode_planes(positions: Union[Sequence[PositionLike], PositionBatch], *, dtype: npt.DTypeLike = np.uint8) -> np.ndarray:
+    """
+    Encodes the given positions as a new array of shape
+    ``(N, PLANES, 8, 8)``. Use a :class:`~chess.batch.PlaneEncoder` to
+    encode repeated batches without allocating.
+    """
+    return PlaneEncoder(len(positions), dtype=dtype).encode(positions)
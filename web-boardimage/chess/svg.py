@@ -24,10 +24,14 @@ import chess
 from typing import Dict, Iterable, Optional, Tuple, Union
 
 
+SVG_TAG = f"{{{namespaces['']}}}svg"
+XLINK_HREF = f"{{{namespaces['xlink']}}}href"
+
 SQUARE_SIZE = 45
 MARGIN = 20
 
 _PIECE_SETS = {}  # We will load the pieces dynamically
+_PIECE_DEFS: Dict[str, Dict[str, ET.Element]] = {}  # Parsed from _PIECE_SETS
 
 COORDS = {
     "1": """<path d="M6.754 26.996h2.578v-8.898l-2.805.562v-1.437l2.79-.563h1.578v10.336h2.578v1.328h-6.72z"/>""",  # noqa: E501
@@ -151,9 +155,10 @@ class SvgWrapper(str):
 
 
 def _svg(viewbox: int, size: Optional[int]) -> ET.Element:
-    svg = ET.Element("svg", {
-        "xmlns": "http://www.w3.org/2000/svg",
-        "xmlns:xlink": "http://www.w3.org/1999/xlink",
+    # Use qualified names, so that ElementTree emits each namespace
+    # declaration exactly once, no matter how many embedded piece SVGs
+    # declare the same namespaces again.
+    svg = ET.Element(SVG_TAG, {
         "viewBox": f"0 0 {viewbox:d} {viewbox:d}",
     })
 
@@ -223,6 +228,10 @@ def _piece_defs_id(piece: chess.Piece, *, piece_set: str) -> str:
 
     return f'{chess.COLOR_NAMES[piece.color].lower()}-{chess.PIECE_NAMES[piece.piece_type].lower()}'
 
+def _piece_set_dir() -> str:
+    PIECE_DIR = 'new_piece'  # TODO change back to 'piece'
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), PIECE_DIR)
+
 def load_pieces(piece_set: str) -> Dict[str, str]:
     """
     Loads piece SVGs from the specified piece set directory or from the cache.
@@ -247,8 +256,6 @@ def load_pieces(piece_set: str) -> Dict[str, str]:
     if piece_set in _PIECE_SETS:
         return _PIECE_SETS[piece_set]
 
-    PIECE_DIR = 'new_piece'  # TODO change back to 'piece'
-
     pieces = {}
     for piece_type in chess.PIECE_TYPES:
         for color in chess.COLORS:
@@ -259,8 +266,7 @@ def load_pieces(piece_set: str) -> Dict[str, str]:
                 # assert piece_set == 'mono', f'Duplicate piece code for piece set {piece_set}'
                 continue
             
-            this_dir = os.path.dirname(os.path.realpath(__file__))
-            piece_set_dir = os.path.join(this_dir, PIECE_DIR, piece_set)
+            piece_set_dir = os.path.join(_piece_set_dir(), piece_set)
             piece_svg_file = os.path.join(piece_set_dir, f"{piece_code}.svg")
             with open(piece_svg_file, "r") as f:
                 pieces[piece_code] = f.read()
@@ -270,6 +276,49 @@ def load_pieces(piece_set: str) -> Dict[str, str]:
 
     return pieces
 
+def load_piece_defs(piece_set: str) -> Dict[str, ET.Element]:
+    """
+    Like :func:`load_pieces()`, but the values are parsed elements, ready
+    to be placed into the ``<defs>`` section of a board. Each element
+    already carries the ``id`` used to reference it
+    (see :func:`_piece_defs_id()`).
+
+    The elements are cached and shared between all rendered boards, so they
+    must be treated as immutable.
+    """
+    try:
+        return _PIECE_DEFS[piece_set]
+    except KeyError:
+        pass
+
+    pieces = load_pieces(piece_set)
+
+    piece_defs = {}
+    for piece_type in chess.PIECE_TYPES:
+        for color in chess.COLORS:
+            piece = chess.Piece(piece_type, color)
+            piece_code = _piece_code(piece, piece_set=piece_set)
+            if piece_code in piece_defs:
+                continue
+
+            svg_element = ET.fromstring(pieces[piece_code])
+            svg_element.set("id", _piece_defs_id(piece, piece_set=piece_set))
+            piece_defs[piece_code] = svg_element
+
+    _PIECE_DEFS[piece_set] = piece_defs
+    return piece_defs
+
+def preload_pieces(piece_sets: Optional[Iterable[str]] = None) -> None:
+    """
+    Eagerly loads and parses the given piece sets (by default all available
+    piece sets), so that rendering boards never touches the disk.
+    """
+    if piece_sets is None:
+        piece_sets = sorted(os.listdir(_piece_set_dir()))
+
+    for piece_set in piece_sets:
+        load_piece_defs(piece_set)
+
 def piece(piece: chess.Piece, size: Optional[int] = None, piece_set: str = "alpha") -> str:
     """
     Renders the given :class:`chess.Piece` as an SVG image.
@@ -371,23 +420,20 @@ def board(
     defs = ET.SubElement(svg, "defs")
     existing_piece_defs: set[str] = set()
     if board:
-        pieces = load_pieces(piece_set)
+        piece_defs = load_piece_defs(piece_set)
         for piece_color in chess.COLORS:
             for piece_type in chess.PIECE_TYPES:
                 if board.pieces_mask(piece_type, piece_color):
                     # Get the piece "code"
                     piece = chess.Piece(piece_type, piece_color)
                     piece_code = _piece_code(piece, piece_set=piece_set)
-                    piece_defs_id = _piece_defs_id(piece, piece_set=piece_set)
-                    if piece_defs_id in existing_piece_defs:
+                    if piece_code in existing_piece_defs:
                         # This should only happen for `piece_set == 'mono'`
                         # assert piece_set == 'mono', f'Duplicate piece code for piece set {piece_set}'
                         continue
 
-                    svg_content = pieces[piece_code]
-                    svg_element = ET.fromstring(svg_content)
-                    svg_element.set("id", piece_defs_id)
-                    defs.append(svg_element)
+                    existing_piece_defs.add(piece_code)
+                    defs.append(piece_defs[piece_code])
 
     squares = chess.SquareSet(squares) if squares else chess.SquareSet()
     if squares:
@@ -521,7 +567,7 @@ def board(
                 href = f"#{piece_defs_id}"
                 ET.SubElement(svg, "use", {
                     "href": href,
-                    "xlink:href": href,
+                    XLINK_HREF: href,
                     "transform": f"translate({x:d}, {y:d})",
                     "height": str(SQUARE_SIZE),
                     "width": str(SQUARE_SIZE),
@@ -531,7 +577,7 @@ def board(
         if square in squares:
             ET.SubElement(svg, "use", _attrs({
                 "href": "#xx",
-                "xlink:href": "#xx",
+                XLINK_HREF: "#xx",
                 "x": x,
                 "y": y,
             }))
@@ -608,10 +654,4 @@ def board(
                 "class": "arrow",
             }))
 
-    # TODO: Only sometimes, we get duplicate `xmlns`/`xmlns:xlink` attributes
-    # after we have combined multiple SVGs in the `<defs>` section.
-    # This just removes them manually for now - still breaks some piece sets
-    svg.attrib.pop('xmlns')
-    # svg.attrib.pop('xmlns:xlink')
-
     return SvgWrapper(ET.tostring(svg).decode("utf-8"))
@@ -118,6 +118,12 @@ class SuicideBoard(chess.Board):
                 if not self.is_en_passant(move):
                     yield move
 
+    def _pseudo_legal_packed(self) -> List[int]:
+        return [move.pack() for move in self.generate_pseudo_legal_moves()]
+
+    def _legal_packed(self) -> List[int]:
+        return [move.pack() for move in self.generate_legal_moves()]
+
     def is_legal(self, move: chess.Move) -> bool:
         if not super().is_legal(move):
             return False
@@ -306,6 +312,12 @@ class AtomicBoard(chess.Board):
             if self.is_legal(move):
                 yield move
 
+    def _any_legal_move(self) -> bool:
+        return any(self.generate_legal_moves())
+
+    def _legal_packed(self) -> List[int]:
+        return [move.pack() for move in self.generate_legal_moves()]
+
     def status(self) -> chess.Status:
         status = super().status()
         status &= ~chess.STATUS_OPPOSITE_CHECK
@@ -370,6 +382,12 @@ class RacingKingsBoard(chess.Board):
             if not self.gives_check(move):
                 yield move
 
+    def _any_legal_move(self) -> bool:
+        return any(self.generate_legal_moves())
+
+    def _legal_packed(self) -> List[int]:
+        return [move.pack() for move in self.generate_legal_moves()]
+
     def is_variant_end(self) -> bool:
         if not self.kings & chess.BB_RANK_8:
             return False
@@ -678,6 +696,8 @@ class HordeBoard(chess.Board):
 ThreeCheckBoardT = TypeVar("ThreeCheckBoardT", bound="ThreeCheckBoard")
 
 class _ThreeCheckBoardState:
+    __slots__ = ("remaining_checks_w", "remaining_checks_b")
+
     def __init__(self, board: ThreeCheckBoard) -> None:
         self.remaining_checks_w = board.remaining_checks[chess.WHITE]
         self.remaining_checks_b = board.remaining_checks[chess.BLACK]
@@ -772,6 +792,20 @@ class ThreeCheckBoard(chess.Board):
         self.remaining_checks[chess.WHITE] = wc
         self.remaining_checks[chess.BLACK] = bc
 
+    def to_bytes(self) -> bytes:
+        # Followed by the remaining checks of each side (1 byte each).
+        return super().to_bytes() + bytes([max(self.remaining_checks[chess.WHITE], 0),
+                                           max(self.remaining_checks[chess.BLACK], 0)])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        if len(data) < 2:
+            raise ValueError(f"truncated packed three-check board: {data!r}")
+        board = super().from_bytes(data[:-2])
+        board.remaining_checks[chess.WHITE] = data[-2]
+        board.remaining_checks[chess.BLACK] = data[-1]
+        return board
+
     def epd(self, shredder: bool = False, en_passant: chess.EnPassantSpec = "legal", promoted: Optional[bool] = None, **operations: Union[None, str, int, float, chess.Move, Iterable[chess.Move]]) -> str:
         epd = [super().epd(shredder=shredder, en_passant=en_passant, promoted=promoted),
                "{:d}+{:d}".format(max(self.remaining_checks[chess.WHITE], 0),
@@ -799,6 +833,10 @@ class ThreeCheckBoard(chess.Board):
         return (super()._transposition_key(),
                 self.remaining_checks[chess.WHITE], self.remaining_checks[chess.BLACK])
 
+    def _position_key(self) -> Hashable:
+        return (super()._position_key(),
+                self.remaining_checks[chess.WHITE], self.remaining_checks[chess.BLACK])
+
     def copy(self, *, stack: Union[bool, int] = True) -> Self:
         board = super().copy(stack=stack)
         board.remaining_checks = self.remaining_checks.copy()
@@ -807,13 +845,10 @@ class ThreeCheckBoard(chess.Board):
             board._three_check_stack = self._three_check_stack[-stack:]
         return board
 
-    def root(self) -> Self:
-        if self._three_check_stack:
-            board = super().root()
-            self._three_check_stack[0].restore(board)
-            return board
-        else:
-            return self.copy(stack=False)
+    def _stack_position(self, index: int) -> Self:
+        board = super()._stack_position(index)
+        self._three_check_stack[index].restore(board)
+        return board
 
     def mirror(self) -> Self:
         board = super().mirror()
@@ -825,13 +860,16 @@ class ThreeCheckBoard(chess.Board):
 CrazyhouseBoardT = TypeVar("CrazyhouseBoardT", bound="CrazyhouseBoard")
 
 class _CrazyhouseBoardState:
+    __slots__ = ("pockets_w", "pockets_b")
+
     def __init__(self, board: CrazyhouseBoard) -> None:
         self.pockets_w = board.pockets[chess.WHITE].copy()
         self.pockets_b = board.pockets[chess.BLACK].copy()
 
     def restore(self, board: CrazyhouseBoard) -> None:
-        board.pockets[chess.WHITE] = self.pockets_w
-        board.pockets[chess.BLACK] = self.pockets_b
+        # Copies of the board share the stack, so never hand out the pockets.
+        board.pockets[chess.WHITE] = self.pockets_w.copy()
+        board.pockets[chess.BLACK] = self.pockets_b.copy()
 
 CrazyhousePocketT = TypeVar("CrazyhousePocketT", bound="CrazyhousePocket")
 
@@ -875,6 +913,13 @@ class CrazyhousePocket:
         pocket._pieces = self._pieces[:]
         return pocket
 
+# Drop moves, indexed by piece type and square. The same instances as
+# chess.Move.from_uci() and chess.Move.from_packed() return.
+_DROPS = {
+    piece_type: [chess.Move.from_packed(0x8000 | piece_type << 12 | square << 6 | square) for square in chess.SQUARES]
+    for piece_type in chess.PIECE_TYPES
+}
+
 class CrazyhouseBoard(chess.Board):
 
     aliases = ["Crazyhouse", "Crazy House", "House", "ZH"]
@@ -930,11 +975,19 @@ class CrazyhouseBoard(chess.Board):
     def is_irreversible(self, move: chess.Move) -> bool:
         return self._reduces_castling_rights(move)
 
+    def _reversible_stack_indexes(self, plies: int) -> range:
+        # Captured pieces can be dropped again, so there is no bound.
+        return range(len(self._stack) - plies, -1, -2)
+
     def _transposition_key(self) -> Hashable:
         return (super()._transposition_key(),
                 self.promoted,
                 str(self.pockets[chess.WHITE]), str(self.pockets[chess.BLACK]))
 
+    def _position_key(self) -> Hashable:
+        return (super()._position_key(),
+                str(self.pockets[chess.WHITE]), str(self.pockets[chess.BLACK]))
+
     def legal_drop_squares_mask(self) -> chess.Bitboard:
         king = self.king(self.turn)
         if king is None:
@@ -981,7 +1034,7 @@ class CrazyhouseBoard(chess.Board):
         for pt in chess.PIECE_TYPES:
             if self.pockets[self.turn].count(pt):
                 for to_square in chess.scan_forward(to_mask & ~self.occupied & (~chess.BB_BACKRANKS if pt == chess.PAWN else chess.BB_ALL)):
-                    yield chess.Move(to_square, to_square, drop=pt)
+                    yield _DROPS[pt][to_square]
 
     def generate_legal_drops(self, to_mask: chess.Bitboard = chess.BB_ALL) -> Iterator[chess.Move]:
         return self.generate_pseudo_legal_drops(to_mask=self.legal_drop_squares_mask() & to_mask)
@@ -991,6 +1044,9 @@ class CrazyhouseBoard(chess.Board):
             super().generate_legal_moves(from_mask, to_mask),
             self.generate_legal_drops(from_mask & to_mask))
 
+    def _legal_packed(self) -> List[int]:
+        return super()._legal_packed() + [move.pack() for move in self.generate_legal_drops()]
+
     def parse_san(self, san: str) -> chess.Move:
         if "@" in san:
             uci = san.rstrip("+#")
@@ -1041,6 +1097,22 @@ class CrazyhouseBoard(chess.Board):
         self.pockets[chess.WHITE] = white_pocket
         self.pockets[chess.BLACK] = black_pocket
 
+    def to_bytes(self) -> bytes:
+        # Followed by the number of pieces of each type in the pockets of
+        # White and Black (1 byte each).
+        return super().to_bytes() + bytes(self.pockets[color].count(piece_type) for color in chess.COLORS for piece_type in chess.PIECE_TYPES)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Self:
+        if len(data) < 12:
+            raise ValueError(f"truncated packed crazyhouse board: {data!r}")
+        board = super().from_bytes(data[:-12])
+        for color, counts in [(chess.WHITE, data[-12:-6]), (chess.BLACK, data[-6:])]:
+            for piece_type, count in zip(chess.PIECE_TYPES, counts):
+                for _ in range(count):
+                    board.pockets[color].add(piece_type)
+        return board
+
     def board_fen(self, *, promoted: Optional[bool] = None) -> str:
         if promoted is None:
             promoted = True
@@ -1060,13 +1132,10 @@ class CrazyhouseBoard(chess.Board):
             board._crazyhouse_stack = self._crazyhouse_stack[-stack:]
         return board
 
-    def root(self) -> Self:
-        if self._crazyhouse_stack:
-            board = super().root()
-            self._crazyhouse_stack[0].restore(board)
-            return board
-        else:
-            return self.copy(stack=False)
+    def _stack_position(self, index: int) -> Self:
+        board = super()._stack_position(index)
+        self._crazyhouse_stack[index].restore(board)
+        return board
 
     def mirror(self) -> Self:
         board = super().mirror()
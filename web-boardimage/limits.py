@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+# web-boardimage is an HTTP service that renders chess board images.
+# Copyright (C) 2016-2017 Niklas Fiekas <niklas.fiekas@backscattering.de>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Admission control for renders: in-flight limits and load shedding"""
+
+import asyncio
+import bisect
+import collections
+import itertools
+
+
+DEFAULT_LIMITS = {
+    "svg": 64,
+    "png": 16,
+    "webp": 16,
+    "animation": 4,
+    "sheet": 4,
+}
+
+
+class Overloaded(Exception):
+    """Raised when a render can not be admitted in time."""
+
+
+class RenderLimiter:
+    """
+    Limits the number of renders in flight per output format, and the sum of
+    their pixels. Renders that do not fit right away wait in a short queue,
+    where smaller renders are admitted first. Renders are rejected with
+    :exc:`Overloaded` if the queue is full or they waited too long.
+
+    A single render larger than the whole pixel budget is still admitted
+    when nothing else is in flight.
+    """
+
+    def __init__(self, *, limits=None, max_pixels=8 * 1024 * 1024, max_queue=64, max_wait=1.0):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.max_pixels = max_pixels
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.in_flight = collections.Counter()
+        self.pixels = 0
+
+        self._waiters = []  # Sorted by (pixels, seq)
+        self._seq = itertools.count()
+
+    def _fits(self, fmt, pixels):
+        if self.in_flight[fmt] >= self.limits.get(fmt, float("inf")):
+            return False
+        return self.pixels == 0 or self.pixels + pixels <= self.max_pixels
+
+    def _take(self, fmt, pixels):
+        self.in_flight[fmt] += 1
+        self.pixels += pixels
+
+    def _wake(self):
+        remaining = []
+        for waiter in self._waiters:
+            pixels, _, fmt, future = waiter
+            if not future.done() and self._fits(fmt, pixels):
+                self._take(fmt, pixels)
+                future.set_result(None)
+            elif not future.done():
+                remaining.append(waiter)
+        self._waiters = remaining
+
+    async def acquire(self, fmt, pixels):
+        """
+        Waits until the render is admitted. Every successful call must be
+        paired with :meth:`release()`.
+        """
+        if not self._waiters and self._fits(fmt, pixels):
+            self._take(fmt, pixels)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            raise Overloaded(f"render queue full ({len(self._waiters)} waiting)")
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (pixels, next(self._seq), fmt, future)
+        bisect.insort(self._waiters, waiter, key=lambda w: w[:2])
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except BaseException as err:
+            if future.done():
+                # Admitted just in time, but nobody is going to use it.
+                self.release(fmt, pixels)
+            else:
+                future.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(err, asyncio.TimeoutError):
+                raise Overloaded(f"waited more than {self.max_wait:.1f}s for a {fmt} render")
+            raise
+
+    def release(self, fmt, pixels):
+        self.in_flight[fmt] -= 1
+        self.pixels -= pixels
+        self._wake()
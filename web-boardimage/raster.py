@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+#
+# web-boardimage is an HTTP service that renders chess board images.
+# Copyright (C) 2016-2017 Niklas Fiekas <niklas.fiekas@backscattering.de>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Raster rendering of boards that redraws only the squares that changed"""
+
+import collections
+import io
+import json
+import math
+import threading
+
+import chess
+import chess.svg as svg
+
+import cairosvg
+from PIL import Image
+
+
+# Hit and miss counts of the rasterizer and sprite caches, for metrics.
+_CACHE_STATS = collections.Counter()
+_CACHE_STATS_LOCK = threading.Lock()
+
+
+def _count(event):
+    with _CACHE_STATS_LOCK:
+        _CACHE_STATS[event] += 1
+
+
+def cache_stats():
+    """Returns counts like ``{"sprite_hit": 10, "sprite_miss": 3}``."""
+    with _CACHE_STATS_LOCK:
+        return dict(_CACHE_STATS)
+
+
+def rasterize(svg_data):
+    return Image.open(io.BytesIO(cairosvg.svg2png(bytestring=svg_data))).convert("RGB")
+
+
+def encode_png(svg_data, *, palette=None, compression=None):
+    """
+    Renders the SVG as a PNG. With *palette*, the image is quantized to at
+    most that many colors and written as an indexed PNG, which is much
+    smaller for boards. *compression* is the zlib level (0-9).
+    """
+    if palette is None and compression is None:
+        return cairosvg.svg2png(bytestring=svg_data)
+
+    image = rasterize(svg_data)
+    if palette is not None:
+        image = image.quantize(palette, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    return save_png(image, compression=compression)
+
+
+def save_png(image, *, compression=None):
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", compress_level=6 if compression is None else compression)
+    return buf.getvalue()
+
+
+def encode_webp(svg_data, *, quality=80, lossless=False, method=4):
+    """
+    Renders the SVG as a WebP. *quality* is 0-100 (for lossless images the
+    compression effort), *method* trades encoding speed (0) for size (6).
+    """
+    buf = io.BytesIO()
+    rasterize(svg_data).save(buf, format="WEBP", quality=quality, lossless=lossless, method=method)
+    return buf.getvalue()
+
+
+class BoardRasterizer:
+    """
+    Renders frames of boards in a fixed style as paletted images.
+
+    Every square is cut from a full board rendered with the same piece on
+    all 64 squares (a sprite board), so a frame only needs one real render
+    per distinct piece and highlight instead of one per position. Frames are
+    composed incrementally: only squares that differ from the previous frame
+    are pasted again.
+
+    Not thread-safe; use :func:`get_rasterizer()` with the lock it returns.
+    """
+
+    def __init__(self, *, size, coordinates, flipped, colors, piece_set):
+        self.size = size
+        self.coordinates = coordinates
+        self.flipped = flipped
+        self.colors = colors
+        self.piece_set = piece_set
+
+        margin = 15 if coordinates else 0
+        full_size = 2 * margin + 8 * svg.SQUARE_SIZE
+        scale = size / full_size
+
+        self.boxes = []
+        for square in chess.SQUARES:
+            col = 7 - chess.square_file(square) if flipped else chess.square_file(square)
+            row = chess.square_rank(square) if flipped else 7 - chess.square_rank(square)
+            x0 = round((margin + col * svg.SQUARE_SIZE) * scale)
+            y0 = round((margin + row * svg.SQUARE_SIZE) * scale)
+            x1 = round((margin + (col + 1) * svg.SQUARE_SIZE) * scale)
+            y1 = round((margin + (row + 1) * svg.SQUARE_SIZE) * scale)
+            self.boxes.append((x0, y0, x1, y1))
+
+        self.highlight_colors = dict(colors)
+        for shade in ["light", "dark"]:
+            self.highlight_colors[f"square {shade}"] = colors.get(
+                f"square {shade} lastmove", svg.DEFAULT_COLORS[f"square {shade} lastmove"]
+            )
+
+        # Derive one palette that covers pieces, highlights and the check
+        # gradient, so that all tiles can be quantized once and pasted as is.
+        self.palette = rasterize(self._svg(
+            chess.Board(),
+            lastmove=chess.Move(chess.E2, chess.D2),
+            check=chess.E1,
+        )).quantize(255)
+
+        self._sprites = {}
+        self._frame = None
+        self._keys = None
+
+    def _svg(self, board, *, lastmove=None, check=None, colors=None):
+        return svg.board(
+            board,
+            size=self.size,
+            coordinates=self.coordinates,
+            flipped=self.flipped,
+            colors=self.colors if colors is None else colors,
+            piece_set=self.piece_set,
+            lastmove=lastmove,
+            check=check,
+        )
+
+    def _quantize(self, image):
+        return image.quantize(palette=self.palette, dither=Image.Dither.NONE)
+
+    def _sprite(self, symbol, highlight):
+        try:
+            sprite = self._sprites[symbol, highlight]
+        except KeyError:
+            _count("sprite_miss")
+        else:
+            _count("sprite_hit")
+            return sprite
+
+        board = chess.BaseBoard.empty()
+        if symbol:
+            piece = chess.Piece.from_symbol(symbol)
+            board.set_piece_map(dict.fromkeys(chess.SQUARES, piece))
+        colors = self.highlight_colors if highlight else self.colors
+        sprite = self._sprites[symbol, highlight] = self._quantize(rasterize(self._svg(board, colors=colors)))
+        return sprite
+
+    def _tile(self, square, key):
+        symbol, highlight, check = key
+        if not check:
+            return self._sprite(symbol, highlight).crop(self.boxes[square])
+
+        try:
+            return self._sprites[square, key]
+        except KeyError:
+            pass
+
+        board = chess.BaseBoard.empty()
+        board.set_piece_at(square, chess.Piece.from_symbol(symbol))
+        colors = self.highlight_colors if highlight else self.colors
+        image = self._quantize(rasterize(self._svg(board, check=square, colors=colors)))
+        tile = self._sprites[square, key] = image.crop(self.boxes[square])
+        return tile
+
+    def frame(self, board, *, lastmove=None, check=None):
+        """
+        Returns a new paletted image of the given board, reusing the
+        previous frame for all squares that did not change.
+        """
+        highlighted = {lastmove.from_square, lastmove.to_square} if lastmove else set()
+
+        keys = []
+        for square in chess.SQUARES:
+            piece = board.piece_at(square)
+            keys.append((
+                piece.symbol() if piece else None,
+                square in highlighted,
+                square == check,
+            ))
+
+        if self._frame is None:
+            self._frame = self._sprite(None, False).copy()
+            self._keys = [(None, False, False)] * 64
+
+        for square, (old_key, new_key) in enumerate(zip(self._keys, keys)):
+            if old_key != new_key:
+                self._frame.paste(self._tile(square, new_key), self.boxes[square][:2])
+
+        self._keys = keys
+        return self._frame.copy()
+
+
+_RASTERIZERS = collections.OrderedDict()
+_RASTERIZERS_LOCK = threading.Lock()
+MAX_RASTERIZERS = 8
+
+
+def get_rasterizer(*, size, coordinates, flipped, colors, piece_set):
+    """
+    Returns a cached :class:`BoardRasterizer` and a lock that must be held
+    while using it. The least recently used rasterizers (and their sprites)
+    are evicted beyond ``MAX_RASTERIZERS``.
+    """
+    key = (size, coordinates, flipped, json.dumps(colors, sort_keys=True), piece_set)
+    with _RASTERIZERS_LOCK:
+        try:
+            _RASTERIZERS.move_to_end(key)
+        except KeyError:
+            _count("rasterizer_miss")
+        else:
+            _count("rasterizer_hit")
+            return _RASTERIZERS[key]
+
+    # Building the sprites takes a while, so do not block the threads using
+    # other rasterizers. Concurrent misses for the same key may both build
+    # one, but only the first is kept.
+    rasterizer = BoardRasterizer(size=size, coordinates=coordinates, flipped=flipped, colors=colors, piece_set=piece_set)
+
+    with _RASTERIZERS_LOCK:
+        try:
+            _RASTERIZERS.move_to_end(key)
+        except KeyError:
+            entry = _RASTERIZERS[key] = (rasterizer, threading.Lock())
+            while len(_RASTERIZERS) > MAX_RASTERIZERS:
+                _RASTERIZERS.popitem(last=False)
+            return entry
+        else:
+            return _RASTERIZERS[key]
+
+
+def render_sheet(boards, *, style, columns, gap):
+    """
+    Renders the boards into a single paletted image, row by row with the
+    given number of columns. All boards share the sprites of one
+    :class:`BoardRasterizer`, and the gaps between them are transparent.
+    """
+    rasterizer, lock = get_rasterizer(**style)
+    size = style["size"]
+    rows = math.ceil(len(boards) / columns)
+
+    # The rasterizer palette has at most 255 colors, so the last entry is
+    # free for the transparent background.
+    palette = rasterizer.palette.getpalette()[:255 * 3]
+    palette += [0] * (255 * 3 - len(palette)) + [255, 255, 255]
+    sheet = Image.new("P", (columns * (size + gap) - gap, rows * (size + gap) - gap), 255)
+    sheet.putpalette(palette)
+    sheet.info["transparency"] = 255
+
+    with lock:
+        for index, board in enumerate(boards):
+            row, col = divmod(index, columns)
+            sheet.paste(rasterizer.frame(board), (col * (size + gap), row * (size + gap)))
+
+    return sheet
+
+
+def write_animation(fp, frames, *, fmt, durations):
+    """
+    Encodes the given paletted frames as an animated GIF (``fmt="gif"``)
+    or APNG (``fmt="png"``) into the file-like object *fp*.
+    """
+    first, *rest = frames
+    if fmt == "gif":
+        first.save(fp, format="GIF", save_all=True, append_images=rest, duration=durations, loop=0, optimize=False)
+    elif fmt == "png":
+        first.save(fp, format="PNG", save_all=True, append_images=rest, duration=durations, loop=0, default_image=False)
+    else:
+        raise ValueError(f"unsupported animation format: {fmt!r}")
@@ -20,84 +20,89 @@
 """An HTTP service that renders chess board images"""
 
 import argparse
+import asyncio
 import aiohttp.web
 
 import chess
+import chess.pgn
 import chess.svg as svg
+import cache
+import limits
+import metrics
+import raster
 
-import cairosvg
 import json
 import os
 import random
 import colorsys
-from collections import deque
-import re
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import itertools
+import logging
+import math
+import time
+import tracemalloc
 
 
-def split_not_in_quotes(
-    s: str, delim: str = " ", quotes: list[tuple[str, str]] | None = None
-) -> list[str]:
-    """
-    Split a string on a delimeter if the delimeter is not inside a pair of quotes.
-    """
-    if quotes is None:
-        quotes = [('"', '"'), ("'", "'")]
-
-    # Validate that the 'quotes' are all 1 character long
-    assert all(
-        len(q[0]) == 1 and len(q[1]) == 1 for q in quotes
-    ), "All quotes must be exactly 1 character long"
-
-    # Loop through the string and keep track of whether we are inside a quoted string using a stack
-    stack = deque()
-    splits = []
-    current_split = []
-
-    for char in s:
-        if not stack and char == delim:
-            splits.append("".join(current_split))
-            current_split = []
-        else:
-            current_split.append(char)
-
-        if stack and char == stack[-1]:
-            stack.pop()
-        elif not stack:
-            for open_quote, close_quote in quotes:
-                if char == open_quote:
-                    stack.append(close_quote)
-                    break
+logger = logging.getLogger(__name__)
 
-    # Add the last split
-    if current_split:
-        splits.append("".join(current_split))
+AFFIRMATIVE_STRS = [
+    "1",
+    "true",
+    "True",
+    "yes",
+]
 
-    return splits
+THIS_DIR = os.path.dirname(__file__)
+PIECE_SETS = os.listdir(os.path.join(THIS_DIR, "piece_png"))
 
+# Bump whenever the rendered output changes for the same parameters, so that
+# clients and caches do not keep serving stale images.
+RENDER_VERSION = 1
 
-def deduplicate_svg_attrs(svg_string: str) -> str:
-    """Deduplicate the attributes in the outer `<svg>` tag in the given SVG string."""
+CACHE_MAX_AGE = 365 * 24 * 60 * 60
 
-    # We just want to match the very first <svg> opening tag, ex:
-    # <svg xmlns="http://www.w3.org/2000/svg" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" viewBox="0 0 45 45">
-    # Then we do a simple string manipulation to remove duplicate attributes
-    PAT = re.compile(r"<svg ?([^>]*)>")
-    svg_attrs = re.match(PAT, svg_string).group(1)
+CONTENT_TYPES = {
+    "svg": "image/svg+xml; charset=utf-8",
+    "png": "image/png",
+    "webp": "image/webp",
+}
 
-    # We shouldn't assume the attributes' values are always the same even if the attribute names are the same.
-    # However, if there are two attributes with the same name, the one that will be used is the last one, so
-    # as we iterate through the attrs, we can always overwrite the previous value.
-    attrs = {}
-    for attr in split_not_in_quotes(svg_attrs):
-        key, value = attr.split("=", 1)
-        attrs[key] = value
+MIN_SIZE = 16
+MAX_SIZE = 1024
 
-    # Reconstruct the attributes string
-    new_attrs = " ".join([f"{key}={value}" for key, value in attrs.items()])
-    return re.sub(PAT, f"<svg {new_attrs}>", svg_string, count=1)
+MAX_ANIMATION_SIZE = 512
+MAX_ANIMATION_PLIES = 400
 
-THIS_DIR = os.path.dirname(__file__)
-PIECE_SETS = os.listdir(os.path.join(THIS_DIR, "piece_png"))
+MAX_SHEET_SIZE = 360
+MAX_SHEET_BOARDS = 64
+
+REGISTRY = metrics.Registry()
+REQUESTS = REGISTRY.counter(
+    "boardimage_requests_total", "HTTP requests by route and status.", ["route", "status"]
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "boardimage_request_seconds", "Total request handling time by route.", ["route"]
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "boardimage_stage_seconds", "Time spent in each render stage.", ["stage"]
+)
+RENDERS = REGISTRY.counter(
+    "boardimage_renders_total",
+    "Successful renders by kind (board, animation or sheet), format, piece set and size bucket.",
+    ["kind", "format", "piece_set", "size"],
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "boardimage_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"]
+)
+SHED_REQUESTS = REGISTRY.counter(
+    "boardimage_shed_requests_total", "Requests rejected by the render limiter.", ["format"]
+)
+SLOW_REQUESTS = REGISTRY.counter(
+    "boardimage_slow_requests_total", "Requests over the slow request threshold."
+)
 
 
 def load_theme(name):
@@ -163,19 +168,452 @@ def generate_color_scheme():
     return color_scheme
 
 
+def preload_pieces():
+    """Parse all piece sets up front and report the time and memory spent."""
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+
+    svg.preload_pieces(PIECE_SETS)
+
+    elapsed = time.perf_counter() - start
+    after, _ = tracemalloc.get_traced_memory()
+    if not tracing:
+        tracemalloc.stop()
+
+    logger.info(
+        "Preloaded %d piece sets in %.2fs (%.1f MiB)",
+        len(PIECE_SETS), elapsed, (after - before) / (1024 * 1024),
+    )
+
+
+def render_key(options, fmt, encoding=None):
+    """
+    Returns a canonical string for a render, so that equivalent requests
+    (e.g. differing only in parameter order or FEN counters) map to the same
+    key.
+    """
+    lastmove = options["lastmove"]
+    return json.dumps(
+        {
+            "version": RENDER_VERSION,
+            "format": fmt,
+            "encoding": encoding or {},
+            "board": options["board"].board_fen(),
+            "size": options["size"],
+            "lastmove": lastmove.uci() if lastmove else None,
+            "check": options["check"],
+            "arrows": [arrow.pgn() for arrow in options["arrows"]],
+            "squares": int(options["squares"]),
+            "flipped": options["flipped"],
+            "coordinates": options["coordinates"],
+            "colors": options["colors"],
+            "pieceSet": options["piece_set"],
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def render_etag(key):
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def is_not_modified(request, etag):
+    """Checks the ``If-None-Match`` header against the given strong ETag."""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    # If-None-Match uses the weak comparison function (RFC 9110, 13.1.2).
+    return any(tag.value in (etag, "*") for tag in if_none_match)
+
+
+def animation_key(board, style, fmt, delay, last_delay):
+    """Like :func:`render_key()`, but for the moves played on *board*."""
+    return json.dumps(
+        {
+            "version": RENDER_VERSION,
+            "format": fmt,
+            "start": board.root().fen(),
+            "moves": [move.uci() for move in board.move_stack],
+            "size": style["size"],
+            "flipped": style["flipped"],
+            "coordinates": style["coordinates"],
+            "colors": style["colors"],
+            "pieceSet": style["piece_set"],
+            "delay": delay,
+            "lastDelay": last_delay,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def sheet_key(boards, style, columns, gap, encoding):
+    """Like :func:`render_key()`, but for a contact sheet of boards."""
+    return json.dumps(
+        {
+            "version": RENDER_VERSION,
+            "format": "sheet.png",
+            "encoding": encoding,
+            "boards": [board.board_fen() for board in boards],
+            "columns": columns,
+            "gap": gap,
+            "size": style["size"],
+            "flipped": style["flipped"],
+            "coordinates": style["coordinates"],
+            "colors": style["colors"],
+            "pieceSet": style["piece_set"],
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def stopwatch(request):
+    """Returns the stopwatch of the request, see :meth:`Service.middleware()`."""
+    try:
+        return request["stopwatch"]
+    except KeyError:
+        return metrics.Stopwatch()
+
+
+def render_board(options, fmt, encoding=None, watch=None):
+    """Renders a board image in the given format and returns its data."""
+    watch = watch or metrics.Stopwatch()
+    with watch.stage("svg"):
+        svg_data = svg.board(**options)
+    if fmt == "svg":
+        return svg_data.encode("utf-8")
+
+    encode = raster.encode_png if fmt == "png" else raster.encode_webp
+    with watch.stage("raster"):
+        return encode(svg_data, **(encoding or {}))
+
+
+def read_positions(path):
+    """
+    Reads positions to warm the render cache with, from a JSON list like
+    ``fen_data_list.json`` (FENs or objects with ``fen`` and optional
+    ``lastMove`` and ``check``), an EPD file, or a PGN file (every position
+    of the mainline of each game). Yields the board related keyword
+    arguments for :func:`chess.svg.board()`.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path) as f:
+        if ext == ".json":
+            for entry in json.load(f):
+                if isinstance(entry, str):
+                    entry = {"fen": entry}
+                yield {
+                    "board": chess.Board(entry["fen"]),
+                    "lastmove": chess.Move.from_uci(entry["lastMove"]) if entry.get("lastMove") else None,
+                    "check": chess.parse_square(entry["check"]) if entry.get("check") else None,
+                }
+        elif ext == ".epd":
+            for line in f:
+                if line.strip():
+                    board, _ = chess.Board.from_epd(line)
+                    yield {"board": board, "lastmove": None, "check": None}
+        elif ext == ".pgn":
+            while True:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    break
+                board = game.board()
+                yield {"board": board.copy(stack=False), "lastmove": None, "check": None}
+                for move in game.mainline_moves():
+                    board.push(move)
+                    yield {
+                        "board": board.copy(stack=False),
+                        "lastmove": move,
+                        "check": board.king(board.turn) if board.is_check() else None,
+                    }
+        else:
+            raise ValueError(f"expected a .json, .epd or .pgn file: {path}")
+
+
+async def warm_cache(service, positions, styles, formats, *, concurrency):
+    """
+    Renders every position in every style and format into the render caches
+    of the service, skipping renders that are already cached. Logs progress
+    and throughput.
+    """
+    loop = asyncio.get_running_loop()
+    jobs = itertools.product(positions, styles, formats)
+    total = len(positions) * len(styles) * len(formats)
+    done = rendered = 0
+    start = last_report = time.perf_counter()
+
+    def report():
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Warmed %d/%d renders (%d rendered, %.1f renders/s)",
+            done, total, rendered, rendered / elapsed if elapsed else 0,
+        )
+
+    async def worker():
+        nonlocal done, rendered, last_report
+        for position, style, fmt in jobs:
+            options = dict(style, **position, arrows=[], squares=chess.SquareSet())
+            etag = render_etag(render_key(options, fmt))
+            if not service.is_cached(etag):
+                data = await loop.run_in_executor(service.executor, render_board, options, fmt)
+                service.store(etag, data)
+                rendered += 1
+            done += 1
+
+            if time.perf_counter() - last_report >= 1.0:
+                last_report = time.perf_counter()
+                report()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await service.flush()
+    report()
+
+
+class RenderFileResponse(aiohttp.web.FileResponse):
+    """
+    Serves a render from the disk cache with ``sendfile``, keeping the ETag
+    of the render instead of the one aiohttp derives from the modification
+    time and size of the file.
+    """
+
+    def __init__(self, path, *, etag, **kwargs):
+        super().__init__(path, **kwargs)
+        self._render_etag = etag
+
+    @property
+    def etag(self):
+        return super().etag
+
+    @etag.setter
+    def etag(self, value):
+        aiohttp.web.StreamResponse.etag.fset(self, self._render_etag)
+
+
+def render_animation(fp, board, style, fmt, delay, last_delay, watch):
+    """
+    Replays the moves of *board* from its root position and writes the
+    animation to *fp*. Meant to run in the raster worker pool.
+    """
+    rasterizer, lock = raster.get_rasterizer(**style)
+
+    replay = board.root()
+    frames = []
+    with lock, watch.stage("frames"):
+        frames.append(rasterizer.frame(replay, check=replay.king(replay.turn) if replay.is_check() else None))
+        for move in board.move_stack:
+            replay.push(move)
+            frames.append(rasterizer.frame(
+                replay,
+                lastmove=move,
+                check=replay.king(replay.turn) if replay.is_check() else None,
+            ))
+
+    durations = [delay] * (len(frames) - 1) + [last_delay]
+    with watch.stage("encode"):
+        raster.write_animation(fp, frames, fmt=fmt, durations=durations)
+
+
+class StreamWriter(io.RawIOBase):
+    """
+    File-like object for worker threads, that hands written data over to an
+    :class:`asyncio.Queue` in chunks. ``None`` is put when closed.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, loop, queue):
+        self.loop = loop
+        self.queue = queue
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.CHUNK_SIZE:
+            self._put(bytes(self.buffer))
+            self.buffer.clear()
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            if self.buffer:
+                self._put(bytes(self.buffer))
+                self.buffer.clear()
+            self._put(None)
+        super().close()
+
+    def _put(self, item):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+
 class Service:
-    def make_svg(self, request):
+    def __init__(self, executor=None, *, limiter=None, cache=None, disk_cache=None, retry_after=1,
+                 slow_threshold=1.0, slow_sample_rate=1.0):
+        # Raster worker pool. None is the default executor of the loop.
+        self.executor = executor
+        # No admission control if None.
+        self.limiter = limiter
+        # Render caches in memory and on disk (see cache.py). Either is
+        # optional, and hits in memory are preferred.
+        self.cache = cache
+        self.disk_cache = disk_cache
+        self.retry_after = retry_after
+        self.slow_threshold = slow_threshold
+        self.slow_sample_rate = slow_sample_rate
+        # Writes to the disk cache that are still in progress.
+        self._pending = set()
+
+    @contextlib.asynccontextmanager
+    async def admit(self, request, fmt, pixels):
+        """
+        Holds a slot of the render limiter, or fails fast with 503 and
+        ``Retry-After`` if the server is overloaded.
+        """
+        if self.limiter is None:
+            yield
+            return
+
+        try:
+            with stopwatch(request).stage("queue"):
+                await self.limiter.acquire(fmt, pixels)
+        except limits.Overloaded as err:
+            SHED_REQUESTS.inc(format=fmt)
+            raise aiohttp.web.HTTPServiceUnavailable(
+                reason=str(err), headers={"Retry-After": str(self.retry_after)}
+            )
+
+        try:
+            yield
+        finally:
+            self.limiter.release(fmt, pixels)
+
+    @aiohttp.web.middleware
+    async def middleware(self, request, handler):
+        """Records request metrics and logs a sample of slow requests."""
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else "other"
+        watch = request["stopwatch"] = metrics.Stopwatch()
+
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except aiohttp.web.HTTPException as err:
+            status = err.status
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS.inc(route=route, status=status)
+            REQUEST_SECONDS.observe(elapsed, route=route)
+            for stage, seconds in watch.stages.items():
+                STAGE_SECONDS.observe(seconds, stage=stage)
+
+            style = request.get("style")
+            kind, fmt = request.get("render", (None, None))
+            if status == 200 and style is not None and kind is not None and not request.get("cached"):
+                RENDERS.inc(
+                    kind=kind,
+                    format=fmt,
+                    piece_set=style["piece_set"],
+                    size=metrics.size_bucket(style["size"]),
+                )
+
+            if elapsed >= self.slow_threshold:
+                SLOW_REQUESTS.inc()
+                if random.random() < self.slow_sample_rate:
+                    logger.warning(
+                        "Slow request (%.0f ms, status %d): %s %s stages=%s",
+                        elapsed * 1000,
+                        status,
+                        request.path,
+                        json.dumps(dict(request.query)),
+                        json.dumps({stage: round(seconds * 1000, 1) for stage, seconds in watch.stages.items()}),
+                    )
+
+    async def render_metrics(self, request):
+        raster_cache = metrics.Counter(
+            "boardimage_raster_cache_requests_total",
+            "Rasterizer and sprite cache lookups by result.",
+            ["cache", "result"],
+        )
+        for event, count in raster.cache_stats().items():
+            cache_name, result = event.split("_")
+            raster_cache.inc(count, cache=cache_name, result=result)
+
+        text = REGISTRY.expose() + "\n".join(raster_cache.expose()) + "\n"
+        return aiohttp.web.Response(text=text, content_type="text/plain", charset="utf-8")
+
+    def parse_style(self, request, *, max_size=MAX_SIZE):
+        """
+        Parses the query parameters that determine the look of a board, but
+        not its contents. Also returns whether the style is deterministic,
+        i.e. neither colors nor piece set were chosen at random.
+        """
+        deterministic = True
+
+        try:
+            size = min(max(int(request.query.get("size", 360)), MIN_SIZE), max_size)
+        except ValueError:
+            raise aiohttp.web.HTTPBadRequest(reason="size is not a number")
+
+        flipped = request.query.get("orientation", "white") == "black"
+
+        coordinates = request.query.get("coordinates", "0") in AFFIRMATIVE_STRS
+
         try:
-            board = chess.Board(request.query["fen"])
+            if request.query.get("colors") == "random":
+                colors = generate_color_scheme()
+                deterministic = False
+            else:
+                colors = THEMES[request.query.get("colors", "lichess-brown")]
         except KeyError:
-            raise aiohttp.web.HTTPBadRequest(reason="fen required")
+            raise aiohttp.web.HTTPBadRequest(reason="theme colors not found")
+
+        try:
+            if request.query.get("pieceSet") == "random":
+                if request.query.get('avoidMono', 'false') in AFFIRMATIVE_STRS:
+                    piece_set = random.choice([set for set in PIECE_SETS if set != 'mono'])
+                else:
+                    piece_set = random.choice(PIECE_SETS)
+                deterministic = False
+            else:
+                piece_set = request.query.get("pieceSet", "merida")
+                if piece_set not in PIECE_SETS:
+                    raise ValueError
         except ValueError:
-            raise aiohttp.web.HTTPBadRequest(reason="invalid fen")
+            raise aiohttp.web.HTTPBadRequest(reason="invalid piece set")
+
+        style = request["style"] = {
+            "size": size,
+            "coordinates": coordinates,
+            "flipped": flipped,
+            "colors": colors,
+            "piece_set": piece_set,
+        }
+        return style, deterministic
 
+    def parse_options(self, request):
+        """
+        Parses the query of the given request into keyword arguments for
+        :func:`chess.svg.board()`. Also returns whether the render is
+        deterministic, i.e. neither colors nor piece set were chosen at random.
+        """
         try:
-            size = min(max(int(request.query.get("size", 360)), 16), 1024)
+            with stopwatch(request).stage("fen"):
+                board = chess.Board(request.query["fen"])
+        except KeyError:
+            raise aiohttp.web.HTTPBadRequest(reason="fen required")
         except ValueError:
-            raise aiohttp.web.HTTPBadRequest(reason="size is not a number")
+            raise aiohttp.web.HTTPBadRequest(reason="invalid fen")
 
         try:
             uci = request.query.get("lastMove") or request.query["lastmove"]
@@ -210,62 +648,315 @@ class Service:
         except ValueError:
             raise aiohttp.web.HTTPBadRequest(reason="invalid squares")
 
-        flipped = request.query.get("orientation", "white") == "black"
+        options, deterministic = self.parse_style(request)
+        options.update({
+            "board": board,
+            "lastmove": lastmove,
+            "check": check,
+            "arrows": arrows,
+            "squares": squares,
+        })
+        return options, deterministic
 
-        AFFIRMATIVE_STRS = [
-            "1",
-            "true",
-            "True",
-            "yes",
-        ]
+    def make_svg(self, request):
+        options, _ = self.parse_options(request)
+        return svg.board(**options)
 
-        coordinates = request.query.get("coordinates", "0") in AFFIRMATIVE_STRS
+    def cache_headers(self, request, key, deterministic):
+        """
+        Returns the caching headers for the render with the given canonical
+        key, or raises :exc:`aiohttp.web.HTTPNotModified` if the client
+        already has it.
+        """
+        if not deterministic:
+            return {"Cache-Control": "no-store"}
 
-        try:
-            if request.query.get("colors") == "random":
-                colors = generate_color_scheme()
-            else:
-                colors = THEMES[request.query.get("colors", "lichess-brown")]
-        except KeyError:
-            raise aiohttp.web.HTTPBadRequest(reason="theme colors not found")
+        etag = render_etag(key)
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": f"public, max-age={CACHE_MAX_AGE}, immutable",
+        }
+        if is_not_modified(request, etag):
+            CACHE_REQUESTS.inc(cache="etag", result="hit")
+            raise aiohttp.web.HTTPNotModified(headers=headers)
+        CACHE_REQUESTS.inc(cache="etag", result="miss")
+        return headers
+
+    def is_cached(self, etag):
+        return (
+            (self.cache is not None and etag in self.cache)
+            or (self.disk_cache is not None and etag in self.disk_cache)
+        )
+
+    def cached_response(self, request, etag, headers):
+        """
+        Returns a response with the render from the memory or disk cache, or
+        ``None`` if it is not cached (or *etag* is ``None``).
+        """
+        if etag is None:
+            return None
+
+        if self.cache is not None:
+            data = self.cache.get(etag)
+            CACHE_REQUESTS.inc(cache="memory", result="miss" if data is None else "hit")
+            if data is not None:
+                request["cached"] = True
+                return aiohttp.web.Response(body=data, headers=headers)
+
+        if self.disk_cache is not None:
+            path = self.disk_cache.get(etag)
+            CACHE_REQUESTS.inc(cache="disk", result="miss" if path is None else "hit")
+            if path is not None:
+                request["cached"] = True
+                return RenderFileResponse(path, etag=etag, headers=headers)
+
+        return None
 
+    def store(self, etag, data):
+        """
+        Puts a render into the caches, unless *etag* is ``None``. The disk
+        cache is written in the background, so that responses do not wait
+        for it. See :func:`flush()`.
+        """
+        if etag is None:
+            return
+
+        if self.cache is not None:
+            self.cache.put(etag, data)
+
+        if self.disk_cache is not None:
+            task = asyncio.get_running_loop().create_task(self._store_on_disk(etag, data))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _store_on_disk(self, etag, data):
+        # Disk I/O runs in the default executor, not in the raster workers.
         try:
-            if request.query.get("pieceSet") == "random":
-                if request.query.get('avoidMono', 'false') in AFFIRMATIVE_STRS:
-                    piece_set = random.choice([set for set in PIECE_SETS if set != 'mono'])
-                else:
-                    piece_set = random.choice(PIECE_SETS)
+            await asyncio.get_running_loop().run_in_executor(None, self.disk_cache.put, etag, data)
+        except OSError:
+            logger.exception("Failed to write %s to the disk cache", etag)
+
+    async def flush(self):
+        """Waits until all pending writes to the disk cache are done."""
+        while self._pending:
+            await asyncio.wait(list(self._pending))
+
+    async def compact_periodically(self):
+        """Compacts the disk cache every ``compact_interval`` seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.disk_cache.compact_interval)
+            try:
+                await loop.run_in_executor(None, self.disk_cache.compact)
+            except OSError:
+                logger.exception("Failed to compact the disk cache")
+
+    async def background(self, app):
+        """
+        Cleanup context of the app, that compacts the disk cache while the
+        server is running and finishes pending writes on shutdown.
+        """
+        compaction = None
+        if self.disk_cache is not None:
+            compaction = asyncio.create_task(self.compact_periodically())
+
+        yield
+
+        if compaction is not None:
+            compaction.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await compaction
+        await self.flush()
+
+    async def serve_board(self, request, fmt, options, encoding, deterministic):
+        request["render"] = ("board", fmt)
+        key = render_key(options, fmt, encoding)
+        headers = self.cache_headers(request, key, deterministic)
+        headers["Content-Type"] = CONTENT_TYPES[fmt]
+
+        etag = render_etag(key) if deterministic else None
+        response = self.cached_response(request, etag, headers)
+        if response is not None:
+            return response
+
+        async with self.admit(request, fmt, options["size"] ** 2):
+            if fmt == "svg":
+                data = render_board(options, fmt, watch=stopwatch(request))
             else:
-                piece_set = request.query.get("pieceSet", "merida")
-                if piece_set not in PIECE_SETS:
-                    raise ValueError
-        except ValueError:
-            raise aiohttp.web.HTTPBadRequest(reason="invalid piece set")
+                data = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, render_board, options, fmt, encoding, stopwatch(request)
+                )
+        self.store(etag, data)
 
-        return deduplicate_svg_attrs(
-            svg.board(
-                board,
-                coordinates=coordinates,
-                flipped=flipped,
-                lastmove=lastmove,
-                check=check,
-                arrows=arrows,
-                squares=squares,
-                size=size,
-                colors=colors,
-                piece_set=piece_set,
-            )
-        )
+        return aiohttp.web.Response(body=data, headers=headers)
 
     async def render_svg(self, request):
-        return aiohttp.web.Response(
-            text=self.make_svg(request), content_type="image/svg+xml"
-        )
+        options, deterministic = self.parse_options(request)
+        return await self.serve_board(request, "svg", options, None, deterministic)
+
+    def parse_encoding(self, request, fmt):
+        """Parses the quality controls for raster formats."""
+
+        def parse_int(name, lo, hi):
+            try:
+                value = request.query[name]
+            except KeyError:
+                return None
+            try:
+                return min(max(int(value), lo), hi)
+            except ValueError:
+                raise aiohttp.web.HTTPBadRequest(reason=f"{name} is not a number")
+
+        if fmt == "png":
+            encoding = {
+                "palette": parse_int("palette", 2, 256),
+                "compression": parse_int("compression", 0, 9),
+            }
+        else:
+            encoding = {
+                "quality": parse_int("quality", 0, 100),
+                "lossless": request.query.get("lossless", "0") in AFFIRMATIVE_STRS,
+                "method": parse_int("method", 0, 6),
+            }
+        return {key: value for key, value in encoding.items() if value is not None}
+
+    async def render_raster(self, request, fmt):
+        options, deterministic = self.parse_options(request)
+        encoding = self.parse_encoding(request, fmt)
+        return await self.serve_board(request, fmt, options, encoding, deterministic)
 
     async def render_png(self, request):
-        svg_data = self.make_svg(request)
-        png_data = cairosvg.svg2png(bytestring=svg_data)
-        return aiohttp.web.Response(body=png_data, content_type="image/png")
+        return await self.render_raster(request, "png")
+
+    async def render_webp(self, request):
+        return await self.render_raster(request, "webp")
+
+    def parse_animation(self, request):
+        """
+        Parses either a ``pgn`` or a start ``fen`` (defaulting to the standard
+        starting position) with space or comma separated UCI ``moves``.
+        Returns the board with all moves played and the frame delays.
+        """
+        if "pgn" in request.query:
+            game = chess.pgn.read_game(io.StringIO(request.query["pgn"]))
+            if game is None or game.errors:
+                raise aiohttp.web.HTTPBadRequest(reason="invalid pgn")
+            board = game.end().board()
+        else:
+            try:
+                board = chess.Board(request.query.get("fen", chess.STARTING_FEN))
+            except ValueError:
+                raise aiohttp.web.HTTPBadRequest(reason="invalid fen")
+
+            try:
+                for uci in request.query.get("moves", "").replace(",", " ").split():
+                    board.push_uci(uci)
+            except ValueError:
+                raise aiohttp.web.HTTPBadRequest(reason="invalid or illegal move")
+
+        if len(board.move_stack) > MAX_ANIMATION_PLIES:
+            raise aiohttp.web.HTTPBadRequest(reason=f"at most {MAX_ANIMATION_PLIES} plies")
+
+        try:
+            delay = min(max(int(request.query.get("delay", 500)), 20), 10000)
+            last_delay = min(max(int(request.query.get("lastDelay", 3000)), 20), 10000)
+        except ValueError:
+            raise aiohttp.web.HTTPBadRequest(reason="delay is not a number")
+
+        return board, delay, last_delay
+
+    async def render_animation(self, request, fmt):
+        request["render"] = ("animation", "gif" if fmt == "gif" else "apng")
+        with stopwatch(request).stage("pgn"):
+            board, delay, last_delay = self.parse_animation(request)
+        style, deterministic = self.parse_style(request, max_size=MAX_ANIMATION_SIZE)
+        headers = self.cache_headers(request, animation_key(board, style, fmt, delay, last_delay), deterministic)
+        headers["Content-Type"] = "image/gif" if fmt == "gif" else "image/apng"
+
+        async with self.admit(request, "animation", style["size"] ** 2):
+            response = aiohttp.web.StreamResponse(headers=headers)
+            await response.prepare(request)
+
+            loop = asyncio.get_running_loop()
+            queue = asyncio.Queue()
+            watch = stopwatch(request)
+
+            def encode():
+                with StreamWriter(loop, queue) as fp:
+                    render_animation(fp, board, style, fmt, delay, last_delay, watch)
+
+            future = loop.run_in_executor(self.executor, encode)
+            try:
+                while True:
+                    chunk = await queue.get()
+                    if chunk is None:
+                        break
+                    await response.write(chunk)
+            finally:
+                # Keep the render admitted until the worker is really done,
+                # even if the client went away.
+                await asyncio.wait([future])
+            future.result()
+
+        await response.write_eof()
+        return response
+
+    def parse_sheet(self, request):
+        """
+        Parses the boards (repeated ``fen`` parameters) of a contact sheet and
+        its layout: ``columns`` (by default as square as possible) and the
+        ``gap`` between boards in pixels.
+        """
+        fens = request.query.getall("fen", [])
+        if not fens:
+            raise aiohttp.web.HTTPBadRequest(reason="fen required")
+        if len(fens) > MAX_SHEET_BOARDS:
+            raise aiohttp.web.HTTPBadRequest(reason=f"at most {MAX_SHEET_BOARDS} boards")
+
+        try:
+            boards = [chess.Board(fen) for fen in fens]
+        except ValueError:
+            raise aiohttp.web.HTTPBadRequest(reason="invalid fen")
+
+        try:
+            columns = min(max(int(request.query.get("columns", 0)), 0), len(boards))
+            gap = min(max(int(request.query.get("gap", 4)), 0), 64)
+        except ValueError:
+            raise aiohttp.web.HTTPBadRequest(reason="columns and gap must be numbers")
+
+        return boards, columns or math.ceil(math.sqrt(len(boards))), gap
+
+    async def render_sheet(self, request):
+        request["render"] = ("sheet", "png")
+        with stopwatch(request).stage("fen"):
+            boards, columns, gap = self.parse_sheet(request)
+        style, deterministic = self.parse_style(request, max_size=MAX_SHEET_SIZE)
+        encoding = {
+            key: value
+            for key, value in self.parse_encoding(request, "png").items()
+            if key == "compression"
+        }
+        headers = self.cache_headers(request, sheet_key(boards, style, columns, gap, encoding), deterministic)
+
+        watch = stopwatch(request)
+        rows = math.ceil(len(boards) / columns)
+        pixels = columns * rows * style["size"] ** 2
+
+        def render():
+            with watch.stage("frames"):
+                sheet = raster.render_sheet(boards, style=style, columns=columns, gap=gap)
+            with watch.stage("encode"):
+                return raster.save_png(sheet, **encoding)
+
+        async with self.admit(request, "sheet", pixels):
+            data = await asyncio.get_running_loop().run_in_executor(self.executor, render)
+        return aiohttp.web.Response(body=data, content_type="image/png", headers=headers)
+
+    async def render_gif(self, request):
+        return await self.render_animation(request, "gif")
+
+    async def render_apng(self, request):
+        return await self.render_animation(request, "png")
 
 
 if __name__ == "__main__":
@@ -274,11 +965,176 @@ if __name__ == "__main__":
     parser.add_argument(
         "--bind", default="127.0.0.1", help="bind address (default: 127.0.0.1)"
     )
+    parser.add_argument(
+        "--preload-pieces",
+        action="store_true",
+        help="parse all piece sets at startup for flat per-request latency",
+    )
+    parser.add_argument(
+        "--slow-ms",
+        type=float,
+        default=1000,
+        help="log requests slower than this many milliseconds (default: 1000)",
+    )
+    parser.add_argument(
+        "--slow-sample-rate",
+        type=float,
+        default=1.0,
+        help="fraction of slow requests to log (default: 1.0)",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        action="append",
+        default=[],
+        metavar="FORMAT=N",
+        help="renders of a format (svg, png, webp, animation, sheet) to run at once, can be repeated "
+        f"(default: {', '.join(f'{fmt}={n}' for fmt, n in limits.DEFAULT_LIMITS.items())})",
+    )
+    parser.add_argument(
+        "--max-pixels",
+        type=int,
+        default=8 * 1024 * 1024,
+        help="total pixels of renders in flight (default: 8 MiP)",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="renders waiting for admission before shedding load (default: 64)",
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=1000,
+        help="time a render may wait for admission before it is shed (default: 1000)",
+    )
+    parser.add_argument(
+        "--raster-workers",
+        type=int,
+        default=os.cpu_count(),
+        help="threads for rasterizing and encoding images (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=float,
+        default=0,
+        help="keep up to this many MiB of rendered boards in memory (default: 0, no render cache)",
+    )
+    parser.add_argument(
+        "--disk-cache",
+        metavar="DIR",
+        help="keep rendered boards in this directory, shared by all server processes using it",
+    )
+    parser.add_argument(
+        "--disk-cache-mb",
+        type=float,
+        default=1024,
+        help="size of the disk cache in MiB, least recently used renders are deleted beyond (default: 1024)",
+    )
+    parser.add_argument(
+        "--warm",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="render the positions of a .json (like fen_data_list.json), .epd or .pgn file "
+        "into the render cache before accepting requests, can be repeated",
+    )
+    parser.add_argument(
+        "--warm-sizes", type=int, nargs="+", default=[360], help="sizes to warm (default: 360)"
+    )
+    parser.add_argument(
+        "--warm-themes",
+        nargs="+",
+        choices=sorted(THEMES),
+        default=["lichess-brown"],
+        help="color themes to warm (default: lichess-brown)",
+    )
+    parser.add_argument(
+        "--warm-piece-sets", nargs="+", default=["merida"], help="piece sets to warm (default: merida)"
+    )
+    parser.add_argument(
+        "--warm-formats",
+        nargs="+",
+        choices=["svg", "png", "webp"],
+        default=["png"],
+        help="formats to warm (default: png)",
+    )
+    parser.add_argument(
+        "--warm-only",
+        action="store_true",
+        help="exit after warming the disk cache instead of starting the server",
+    )
     args = parser.parse_args()
 
-    app = aiohttp.web.Application()
-    service = Service()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.warm and not args.cache_mb and not args.disk_cache:
+        parser.error("--warm needs a render cache (--cache-mb or --disk-cache)")
+    if args.warm_only and not args.disk_cache:
+        parser.error("--warm-only needs --disk-cache")
+    for piece_set in args.warm_piece_sets:
+        if piece_set not in PIECE_SETS:
+            parser.error(f"invalid piece set: {piece_set!r}")
+    for size in args.warm_sizes:
+        if not MIN_SIZE <= size <= MAX_SIZE:
+            parser.error(f"warm size {size} out of range (requests are clamped to {MIN_SIZE} to {MAX_SIZE})")
+
+    try:
+        positions = [position for path in args.warm for position in read_positions(path)]
+    except (OSError, ValueError) as err:
+        parser.error(f"can not read positions to warm: {err}")
+
+    if args.preload_pieces:
+        preload_pieces()
+
+    max_in_flight = dict(limits.DEFAULT_LIMITS)
+    for limit in args.max_in_flight:
+        try:
+            fmt, n = limit.split("=", 1)
+            max_in_flight[fmt] = int(n)
+        except ValueError:
+            parser.error(f"invalid --max-in-flight: {limit!r}")
+
+    service = Service(
+        concurrent.futures.ThreadPoolExecutor(max_workers=args.raster_workers),
+        limiter=limits.RenderLimiter(
+            limits=max_in_flight,
+            max_pixels=args.max_pixels,
+            max_queue=args.max_queue,
+            max_wait=args.max_wait_ms / 1000,
+        ),
+        slow_threshold=args.slow_ms / 1000,
+        slow_sample_rate=args.slow_sample_rate,
+        cache=cache.RenderCache(max_bytes=int(args.cache_mb * 1024 * 1024)) if args.cache_mb else None,
+        disk_cache=cache.DiskRenderCache(
+            args.disk_cache, max_bytes=int(args.disk_cache_mb * 1024 * 1024)
+        ) if args.disk_cache else None,
+    )
+    app = aiohttp.web.Application(middlewares=[service.middleware])
+    app.cleanup_ctx.append(service.background)
     app.router.add_get("/board.png", service.render_png)
     app.router.add_get("/board.svg", service.render_svg)
+    app.router.add_get("/board.webp", service.render_webp)
+    app.router.add_get("/animation.gif", service.render_gif)
+    app.router.add_get("/animation.png", service.render_apng)
+    app.router.add_get("/sheet.png", service.render_sheet)
+    app.router.add_get("/metrics", service.render_metrics)
+
+    if positions:
+        styles = [
+            {"size": size, "coordinates": False, "flipped": False, "colors": THEMES[theme], "piece_set": piece_set}
+            for size, theme, piece_set in itertools.product(args.warm_sizes, args.warm_themes, args.warm_piece_sets)
+        ]
+
+        async def warm(app=None):
+            # Startup hooks finish before the server starts listening.
+            await warm_cache(service, positions, styles, args.warm_formats, concurrency=args.raster_workers)
+
+        if args.warm_only:
+            asyncio.run(warm())
+            service.disk_cache.compact()
+            raise SystemExit
+
+        app.on_startup.append(warm)
 
     aiohttp.web.run_app(app, port=args.port, host=args.bind, access_log=None)